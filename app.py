@@ -1,13 +1,11 @@
 # app.py
 
 import os
-import logging
-from flask import Flask, redirect, url_for, session, request, jsonify, render_template, Response
+from flask import Flask, redirect, url_for, session, request, jsonify, render_template, Response, send_from_directory
 from authlib.integrations.flask_client import OAuth
 from dotenv import load_dotenv
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
-from scripts.main import main as process_log
 
 # Load environment variables
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -17,10 +15,23 @@ if not os.path.exists(os.path.join(basedir, env_file)):
     env_file = '.env'
 load_dotenv(os.path.join(basedir, env_file))
 
+# The scripts modules read their settings at import time, so they come after load_dotenv.
+# None of them imports Selenium; the automation stack is loaded by the first job.
+from scripts.errors import InvalidLogError, LoggingError
+from scripts.scheduler import JobScheduler
+from scripts.admission import CapacityExceeded
+from scripts.metrics import METRICS_TOKEN, render_metrics, track_queue_depth
+from scripts.tracing import make_traces_sampler
+from scripts.profiling import PROFILE_DIR
+from scripts.screenshots import SCREENSHOT_DIR
+from scripts.waits import snapshot as wait_snapshot
+from scripts.browser_lifecycle import start_sweeper
+from scripts.logging_setup import configure_logging, get_logger
+
 sentry_sdk.init(
     dsn=os.getenv("SENTRY_DSN"),
     integrations=[FlaskIntegration()],
-    traces_sample_rate=1.0,
+    traces_sampler=make_traces_sampler(),
 )
 
 app = Flask(
@@ -32,9 +43,8 @@ app = Flask(
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key')
 
 ENV = os.getenv('ENV', 'dev').lower()
-logging_level = logging.DEBUG if ENV == "dev" else logging.INFO
-logging.basicConfig(level=logging_level)
-logger = logging.getLogger(__name__)
+configure_logging(ENV)
+logger = get_logger("app")
 
 if ENV in ["production", "heroku"]:
     app.config["SESSION_COOKIE_SAMESITE"] = "None"
@@ -43,6 +53,25 @@ else:
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
     app.config["SESSION_COOKIE_SECURE"] = False
 
+def process_log(log_text, log_water=True, job_id=None):
+    # Importing scripts.main pulls in Selenium and the whole automation stack
+    from scripts.main import main
+    return main(log_text, log_water, job_id=job_id)
+
+scheduler = JobScheduler(process_log)
+track_queue_depth(scheduler.queued_count)
+start_sweeper()
+
+def current_user_key():
+    user = session.get("user") or {}
+    return user.get("email") or user.get("sub") or "anonymous"
+
+def is_admin():
+    if ENV == "dev":
+        return True
+    admins = {email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(",") if email.strip()}
+    return (session.get("user") or {}).get("email", "").lower() in admins
+
 oauth = OAuth(app)
 google = oauth.register(
     name='google',
@@ -99,13 +128,27 @@ def submit_log():
     data = request.json
     log_text = data.get('log', '')
     log_water = data.get('log_water', True)
+    profile = bool(data.get('profile')) and is_admin()
     logger.debug(f"Received log text: {log_text}")
     logger.debug(f"Log water flag: {log_water}")
     if log_text:
         try:
-            output = process_log(log_text, log_water)
+            job = scheduler.submit(current_user_key(), log_text, log_water, profile=profile)
+        except CapacityExceeded as e:
+            logger.warning(f"Submission rejected: {e}")
+            response = jsonify({"output": f"<span style='color: red;'>{e} Please try again in {e.retry_after} seconds.</span>"})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+        try:
+            output = job.wait()
             logger.info("Log processed successfully.")
             return jsonify({"output": output}), 200
+        except InvalidLogError as e:
+            logger.warning(f"Rejected invalid log: {e}")
+            return jsonify({"output": str(e)}), 400
+        except LoggingError as e:
+            logger.error(f"Logging failed: {e}")
+            return jsonify({"output": str(e)}), 502
         except Exception as e:
             logger.error(f"Processing failed: {e}", exc_info=True)
             return jsonify({"output": f"Processing failed: {e}"}), 500
@@ -113,6 +156,38 @@ def submit_log():
         logger.error("No log text provided.")
         return jsonify({"output": "No log text provided."}), 400
 
+@app.route('/queue', methods=['GET'])
+def queue_status():
+    if not session.get("user") and ENV != "dev":
+        return jsonify({"error": "Please log in to view the queue."}), 403
+    return jsonify(scheduler.stats()), 200
+
+@app.route('/waits', methods=['GET'])
+def wait_timing():
+    if not session.get("user") and ENV != "dev":
+        return jsonify({"error": "Please log in to view wait timing."}), 403
+    return jsonify(wait_snapshot()), 200
+
+@app.route('/profiles/<path:filename>', methods=['GET'])
+def profile_file(filename):
+    if not is_admin():
+        return jsonify({"error": "Profiles are only available to admins."}), 403
+    return send_from_directory(os.path.abspath(PROFILE_DIR), filename, mimetype='text/plain')
+
+@app.route('/screenshots/<job_id>/<filename>', methods=['GET'])
+def screenshot_file(job_id, filename):
+    if not session.get("user") and ENV != "dev":
+        return jsonify({"error": "Please log in to view screenshots."}), 403
+    return send_from_directory(os.path.abspath(SCREENSHOT_DIR), f"{job_id}/{filename}")
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Scrapers can't do the OAuth flow, so a bearer token stands in for the session
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        return Response("Unauthorized", status=401)
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
 # Authentication routes
 @app.route('/login')
 def login_route():
@@ -0,0 +1,75 @@
+# scripts/admission.py
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from scripts.browser_lifecycle import active_browsers
+from scripts.logging_setup import get_logger
+
+logger = get_logger("admission")
+
+MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', '5'))
+# A headless Chrome on the Lose It! diary peaks at roughly this much memory
+MIN_FREE_MEMORY_MB = int(os.getenv('MIN_FREE_MEMORY_MB', '512'))
+DEFAULT_JOB_SECONDS = 60
+DURATION_HISTORY_SIZE = 20
+
+class CapacityExceeded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def free_memory_mb():
+    return psutil.virtual_memory().available / (1024 * 1024)
+
+class AdmissionController:
+    """
+    Decides whether a new job may be queued given the running browsers, the
+    queue length and the free memory of the host, and estimates when a
+    rejected client should try again.
+    """
+
+    def __init__(self, max_browsers, max_queued=MAX_QUEUED_JOBS, min_free_memory_mb=MIN_FREE_MEMORY_MB):
+        self.max_browsers = max_browsers
+        self.max_queued = max_queued
+        self.min_free_memory_mb = min_free_memory_mb
+        self._durations = deque(maxlen=DURATION_HISTORY_SIZE)
+        self._lock = threading.Lock()
+
+    def record_duration(self, seconds):
+        with self._lock:
+            self._durations.append(seconds)
+
+    def average_job_seconds(self):
+        with self._lock:
+            if not self._durations:
+                return DEFAULT_JOB_SECONDS
+            return sum(self._durations) / len(self._durations)
+
+    def estimate_retry_after(self, running_started_at):
+        """Seconds until the first running job is expected to finish and free a browser."""
+        average = self.average_job_seconds()
+        if not running_started_at:
+            return max(1, math.ceil(average))
+        now = time.time()
+        remaining = min(average - (now - started) for started in running_started_at)
+        return max(1, math.ceil(remaining))
+
+    def check(self, running_started_at, queued):
+        """Raise CapacityExceeded if the job must not be queued right now."""
+        browsers = max(active_browsers(), len(running_started_at))
+        if browsers >= self.max_browsers and queued >= self.max_queued:
+            retry_after = self.estimate_retry_after(running_started_at)
+            logger.warning(f"Rejecting job: {browsers} browsers running and {queued} jobs queued. Retry after {retry_after}s.")
+            raise CapacityExceeded("All browsers are busy and the queue is full.", retry_after)
+
+        free_mb = free_memory_mb()
+        if free_mb < self.min_free_memory_mb:
+            retry_after = self.estimate_retry_after(running_started_at)
+            logger.warning(f"Rejecting job: only {free_mb:.0f} MB free, {self.min_free_memory_mb} MB required. Retry after {retry_after}s.")
+            raise CapacityExceeded("Not enough free memory to start another browser.", retry_after)
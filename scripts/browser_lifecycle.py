@@ -0,0 +1,253 @@
+# scripts/browser_lifecycle.py
+
+import atexit
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import psutil
+
+from scripts.errors import LoggingError
+from scripts.logging_setup import get_logger
+from scripts.metrics import BROWSER_PEAK_RSS, track_active_browsers
+
+logger = get_logger("browser_lifecycle")
+
+PROFILE_PREFIX = "chrome_profile_"
+PROFILE_ROOT = tempfile.gettempdir()
+# Records the pid and start time of the process that created a profile, so other workers can tell if it is alive
+OWNER_FILE = ".foodlog_owner"
+# Profiles without an owner file, e.g. from before it existed, are only removed once they are older than this
+BROWSER_ORPHAN_AGE_SECONDS = int(os.getenv('BROWSER_ORPHAN_AGE_SECONDS', '3600'))
+BROWSER_SWEEP_INTERVAL_SECONDS = int(os.getenv('BROWSER_SWEEP_INTERVAL_SECONDS', '600'))
+KILL_TIMEOUT_SECONDS = 5
+# Peak memory of one browser's whole process tree; a job over budget is aborted. 0 disables the check.
+BROWSER_RSS_BUDGET_MB = int(os.getenv('BROWSER_RSS_BUDGET_MB', '0'))
+BROWSER_RSS_SAMPLE_SECONDS = float(os.getenv('BROWSER_RSS_SAMPLE_SECONDS', '2'))
+
+_lock = threading.Lock()
+_records = {}
+_sweeper = None
+
+class MemoryBudgetExceeded(LoggingError):
+    """The browser of a job used more memory than BROWSER_RSS_BUDGET_MB."""
+
+class BrowserRecord:
+    """One Chrome launched by initialize_driver(): its process tree, profile directory and extra cleanup."""
+
+    def __init__(self, profile_dir, on_release=None):
+        self.profile_dir = profile_dir
+        self.on_release = on_release
+        self.driver = None
+        self.processes = []
+        self.started_at = time.time()
+        self.released = False
+        self.peak_rss_mb = 0.0
+        self._stop_monitor = threading.Event()
+
+    def attach(self, service, driver=None):
+        """Remember the chromedriver process and everything it has spawned so far."""
+        self.driver = driver
+        try:
+            root = psutil.Process(service.process.pid)
+            self.processes = [root] + root.children(recursive=True)
+        except (AttributeError, psutil.Error) as e:
+            logger.warning(f"Could not read the process tree of the browser: {e}")
+            return
+        if driver is not None:
+            threading.Thread(target=self._monitor_memory, name="browser-rss", daemon=True).start()
+
+    def rss_mb(self):
+        """Resident memory of chromedriver, Chrome and all of its renderers and helpers."""
+        total = 0
+        for process in self._live_processes():
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    def _monitor_memory(self):
+        while not self._stop_monitor.wait(BROWSER_RSS_SAMPLE_SECONDS):
+            rss = self.rss_mb()
+            if rss > self.peak_rss_mb:
+                self.peak_rss_mb = rss
+
+    def check_memory_budget(self):
+        """Raise MemoryBudgetExceeded once the peak, sampled again now, is over BROWSER_RSS_BUDGET_MB."""
+        self.peak_rss_mb = max(self.peak_rss_mb, self.rss_mb())
+        if BROWSER_RSS_BUDGET_MB and self.peak_rss_mb > BROWSER_RSS_BUDGET_MB:
+            logger.error(f"Browser peaked at {self.peak_rss_mb:.0f} MB, over the {BROWSER_RSS_BUDGET_MB} MB budget.")
+            raise MemoryBudgetExceeded(
+                f"<span style='color: red;'>Aborted: the browser used {self.peak_rss_mb:.0f} MB of memory, "
+                f"more than the {BROWSER_RSS_BUDGET_MB} MB budget. Items logged so far are kept; "
+                f"resubmit the rest in smaller batches.</span>"
+            )
+
+    def format_memory_report(self):
+        budget = f" (budget {BROWSER_RSS_BUDGET_MB} MB)" if BROWSER_RSS_BUDGET_MB else ""
+        return f"Peak browser memory: {self.peak_rss_mb:.0f} MB{budget}"
+
+    def _live_processes(self):
+        processes = {process.pid: process for process in self.processes}
+        for process in self.processes:
+            try:
+                for child in process.children(recursive=True):
+                    processes.setdefault(child.pid, child)
+            except psutil.Error:
+                pass
+        return [process for process in processes.values() if process.is_running()]
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self._stop_monitor.set()
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"driver.quit() failed, killing the browser processes: {e}")
+        if self.peak_rss_mb:
+            BROWSER_PEAK_RSS.observe(self.peak_rss_mb)
+        leftover = self._live_processes()
+        if leftover:
+            logger.info(f"Terminating {len(leftover)} leftover browser processes.")
+            _terminate(leftover)
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        if self.on_release:
+            self.on_release()
+
+def _terminate(processes):
+    for process in processes:
+        try:
+            process.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(processes, timeout=KILL_TIMEOUT_SECONDS)
+    for process in alive:
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+
+def active_browsers():
+    with _lock:
+        return sum(1 for record in _records.values() if record.driver is not None)
+
+track_active_browsers(active_browsers)
+
+def create_profile(on_release=None):
+    """Make a temporary user-data directory and start tracking it; attach the driver once Chrome is up."""
+    profile_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX, dir=PROFILE_ROOT)
+    _write_owner(profile_dir)
+    record = BrowserRecord(profile_dir, on_release)
+    with _lock:
+        _records[profile_dir] = record
+    start_sweeper()
+    return record
+
+def _write_owner(profile_dir):
+    try:
+        owner = {"pid": os.getpid(), "create_time": psutil.Process().create_time()}
+        with open(os.path.join(profile_dir, OWNER_FILE), 'w', encoding='utf-8') as f:
+            json.dump(owner, f)
+    except (OSError, psutil.Error) as e:
+        logger.warning(f"Could not record the owner of browser profile {profile_dir}: {e}")
+
+def _owner_alive(profile_dir):
+    """Whether the process that created the profile still runs; None when the profile does not say."""
+    try:
+        with open(os.path.join(profile_dir, OWNER_FILE), 'r', encoding='utf-8') as f:
+            owner = json.load(f)
+        # A reused pid belongs to a process with a different start time
+        return abs(psutil.Process(owner["pid"]).create_time() - owner["create_time"]) < 1
+    except psutil.NoSuchProcess:
+        return False
+    except (OSError, ValueError, KeyError, TypeError, psutil.Error):
+        return None
+
+def _is_orphan(profile_dir, owned, age, max_age):
+    if profile_dir in owned:
+        return False
+    alive = _owner_alive(profile_dir)
+    if alive is None:
+        return age > max_age
+    return not alive
+
+def release(record):
+    """Quit the browser, kill whatever is left of its process tree and delete its profile."""
+    with _lock:
+        _records.pop(record.profile_dir, None)
+    try:
+        record.release()
+    finally:
+        logger.info(f"Released browser profile {record.profile_dir}. {active_browsers()} browsers still running.")
+
+def release_all():
+    with _lock:
+        records = list(_records.values())
+    for record in records:
+        release(record)
+
+atexit.register(release_all)
+
+def sweep_orphans(max_age=BROWSER_ORPHAN_AGE_SECONDS):
+    """
+    Kill Chrome processes and delete profile directories of ours whose owning
+    process has exited. The owner may be another worker, so a profile is only
+    an orphan once the pid and start time in its owner file no longer match a
+    live process; profiles without an owner file fall back to max_age.
+    """
+    now = time.time()
+    with _lock:
+        owned = set(_records)
+    orphans = []
+    for process in psutil.process_iter(["cmdline", "create_time"]):
+        try:
+            cmdline = process.info["cmdline"] or []
+            profile = next(
+                (arg.split("=", 1)[1] for arg in cmdline if arg.startswith("--user-data-dir=")),
+                None,
+            )
+            if (profile and os.path.basename(profile).startswith(PROFILE_PREFIX)
+                    and _is_orphan(profile, owned, now - process.info["create_time"], max_age)):
+                orphans.append(process)
+        except (psutil.Error, TypeError):
+            continue
+    if orphans:
+        logger.warning(f"Killing {len(orphans)} orphaned browser processes.")
+        _terminate(orphans)
+
+    removed = 0
+    for profile_dir in glob.glob(os.path.join(PROFILE_ROOT, f"{PROFILE_PREFIX}*")):
+        try:
+            if _is_orphan(profile_dir, owned, now - os.path.getmtime(profile_dir), max_age):
+                shutil.rmtree(profile_dir, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"Removed {removed} stale browser profiles.")
+    return len(orphans), removed
+
+def _sweep_loop():
+    # The first sweep catches what a crashed earlier process left behind
+    while True:
+        try:
+            sweep_orphans()
+        except Exception as e:
+            logger.error(f"Browser sweep failed: {e}", exc_info=True)
+        time.sleep(BROWSER_SWEEP_INTERVAL_SECONDS)
+
+def start_sweeper():
+    """Start the background sweep; app.py calls this at boot so leftovers of a crash are removed before the first job."""
+    global _sweeper
+    with _lock:
+        if _sweeper is None and BROWSER_SWEEP_INTERVAL_SECONDS > 0:
+            _sweeper = threading.Thread(target=_sweep_loop, name="browser-sweeper", daemon=True)
+            _sweeper.start()
@@ -11,7 +11,9 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 
+from scripts.element_cache import invalidate_elements
 from scripts.navigation import close_overlays
+from scripts.metrics import RETRIES, PAGE_REFRESHES
 
 def retry_on_failure(max_retries=3, delay=2):
     def decorator(func):
@@ -33,7 +35,10 @@ def retry_on_failure(max_retries=3, delay=2):
                     logger.warning(f"Attempt {attempts} for '{func.__name__}' failed: {e}")
                     if attempts < max_retries:
                         logger.info("Refreshing the page and retrying.")
+                        RETRIES.labels(function=func.__name__).inc()
+                        PAGE_REFRESHES.labels(source="retry_on_failure").inc()
                         driver.refresh()
+                        invalidate_elements(driver)
                         close_overlays(driver)
                         time.sleep(delay)
                     else:
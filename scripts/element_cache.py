@@ -0,0 +1,81 @@
+# scripts/element_cache.py
+
+import os
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("element_cache")
+
+ELEMENT_CACHE = os.getenv('ELEMENT_CACHE', 'True').lower() == 'true'
+
+# Every document gets a fresh token, so a handle from before a navigation or refresh never validates
+GENERATION_SCRIPT = "window.__foodlogGeneration = Math.random().toString(36).slice(2);"
+GENERATION_READ_SCRIPT = "return window.__foodlogGeneration;"
+# One round trip instead of the find, is_displayed and is_enabled a fresh lookup costs
+VALIDATE_SCRIPT = """
+const [element, generation] = arguments;
+return window.__foodlogGeneration === generation && element.isConnected
+    && element.getClientRects().length > 0 && !element.disabled;
+"""
+
+class ElementCache:
+    """
+    Element handles of one browser keyed by logical element, e.g. the meal
+    search box of Lunch. A cached handle is reused while it is still attached
+    to the same document and displayed; otherwise the lookup runs again.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def install(self, driver):
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": GENERATION_SCRIPT})
+        driver.element_cache = self
+        return self
+
+    def get(self, driver, key, lookup):
+        """The cached element for key if it is still valid, else lookup() stored under key."""
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            element, generation = entry
+            try:
+                if driver.execute_script(VALIDATE_SCRIPT, element, generation):
+                    self.hits += 1
+                    return element
+            except StaleElementReferenceException:
+                pass
+            del self._entries[key]
+        self.misses += 1
+        element = lookup()
+        if element is not None:
+            self._entries[key] = (element, driver.execute_script(GENERATION_READ_SCRIPT))
+        return element
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def format_report(self):
+        total = self.hits + self.misses
+        if not total:
+            return ""
+        return f"Element cache: {self.hits} of {total} lookups reused a cached handle"
+
+def cached_element(driver, key, lookup):
+    """Look up through the driver's element cache, or call lookup() directly when it has none."""
+    cache = getattr(driver, "element_cache", None)
+    if cache is None:
+        return lookup()
+    return cache.get(driver, key, lookup)
+
+def invalidate_elements(driver):
+    """Forget every cached handle, e.g. after a refresh or an error."""
+    cache = getattr(driver, "element_cache", None)
+    if cache is not None:
+        cache.invalidate()
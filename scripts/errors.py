@@ -0,0 +1,7 @@
+# scripts/errors.py
+
+class LoggingError(Exception):
+    """The whole submission failed before any item could be logged."""
+
+class InvalidLogError(LoggingError):
+    """The submitted log has no item that can be logged; the client has to fix its input."""
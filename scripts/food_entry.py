@@ -3,16 +3,17 @@
 import logging
 from fractions import Fraction
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
     ElementNotInteractableException
 )
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from scripts.logging_setup import get_logger
+from scripts.locators import ADD_FOOD_BUTTON, BRAND_INPUT
+from scripts.screenshots import capture_failure
+from scripts.waits import wait_for
 from scripts.decorators import retry_on_failure
 
 logger = get_logger("food_entry")
@@ -88,10 +89,7 @@ def handle_fractional_serving(actions, fraction_str):
 @retry_on_failure(max_retries=3, delay=2)
 def enter_food_details(driver, food_item):
     try:
-        brand_input_xpath = "//input[@tabindex='1004']"
-        brand_input = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, brand_input_xpath))
-        )
+        brand_input = wait_for(driver, "brand_input", EC.element_to_be_clickable(BRAND_INPUT), 10)
         actions = ActionChains(driver)
 
         # Brand
@@ -194,18 +192,15 @@ def enter_food_details(driver, food_item):
 @retry_on_failure(max_retries=3, delay=2)
 def save_food(driver):
     try:
-        add_food_button_xpath = "//div[@tabindex='1020' and contains(@class, 'addFoodToLog')]"
-        add_food_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, add_food_button_xpath))
-        )
+        add_food_button = wait_for(driver, "add_food_button", EC.element_to_be_clickable(ADD_FOOD_BUTTON), 10)
         add_food_button.click()
         logger.debug("Clicked 'Add Food' button to save the custom food.")
         return True
     except (TimeoutException, NoSuchElementException, ElementNotInteractableException) as e:
         logger.error(f"Error clicking 'Add Food' button: {e}", exc_info=True)
-        driver.save_screenshot("/tmp/save_food_error.png")
+        capture_failure(driver, "save_food_error")
         return False
     except Exception as e:
         logger.error(f"Unexpected error clicking 'Add Food' button: {e}", exc_info=True)
-        driver.save_screenshot("/tmp/save_food_error.png")
+        capture_failure(driver, "save_food_error")
         return False
@@ -0,0 +1,137 @@
+# scripts/history.py
+
+import hashlib
+import json
+import os
+import sqlite3
+from collections import Counter
+from contextlib import closing
+from datetime import datetime
+
+from scripts.utils import normalize_food_item
+from scripts.logging_setup import get_logger
+from scripts.navigation import parse_food_item_date
+
+logger = get_logger("history")
+
+HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', os.path.join('logs', 'history.db'))
+SKIP_ALREADY_LOGGED = os.getenv('SKIP_ALREADY_LOGGED', 'True').lower() == 'true'
+
+# Fields that identify what was entered for an item, beyond its name
+NUTRIENT_FIELDS = [
+    "brand", "serving size", "calories", "fat (g)", "saturated fat (g)",
+    "cholesterol (mg)", "sodium (mg)", "carbs (g)", "fiber (g)",
+    "sugar (g)", "protein (g)",
+]
+
+def _connect():
+    os.makedirs(os.path.dirname(HISTORY_DB_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(HISTORY_DB_PATH, timeout=30)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS logged_items (
+            account TEXT NOT NULL,
+            date TEXT NOT NULL,
+            meal TEXT NOT NULL,
+            name TEXT NOT NULL,
+            nutrient_hash TEXT NOT NULL,
+            logged_at TEXT NOT NULL,
+            water_pending INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    # Stores created before water tracking lack the column
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(logged_items)")]
+    if "water_pending" not in columns:
+        conn.execute("ALTER TABLE logged_items ADD COLUMN water_pending INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logged_items_key "
+        "ON logged_items (account, date, meal, name, nutrient_hash)"
+    )
+    return conn
+
+def item_key(account, food_item):
+    """(account, date, meal, normalized name, nutrient hash) for a parsed food item, or None without a valid date."""
+    target_date = parse_food_item_date(food_item.get("Date", ""))
+    if not target_date:
+        return None
+    normalized = normalize_food_item(food_item)
+    nutrients = json.dumps([normalized.get(field, "") for field in NUTRIENT_FIELDS])
+    return (
+        account or "",
+        target_date.isoformat(),
+        normalized.get("meal") or "dinner",
+        normalized.get("food name", ""),
+        hashlib.sha1(nutrients.encode("utf-8")).hexdigest(),
+    )
+
+def record_logged_item(account, food_item, water_pending=False):
+    """
+    Record a saved food. With water_pending the item's water update is still
+    to be done; mark_water_recorded() clears it as soon as the Record click went through.
+    """
+    key = item_key(account, food_item)
+    if not key:
+        return
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO logged_items (account, date, meal, name, nutrient_hash, logged_at, water_pending) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (datetime.now().isoformat(timespec="seconds"), int(water_pending)),
+            )
+        logger.debug(f"Recorded logged item in history: {key[1:4]}")
+    except sqlite3.Error as e:
+        logger.error(f"Failed to record logged item in history: {e}")
+
+def mark_water_recorded(account, food_item):
+    key = item_key(account, food_item)
+    if not key:
+        return
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "UPDATE logged_items SET water_pending = 0 WHERE rowid = ("
+                "SELECT rowid FROM logged_items WHERE account = ? AND date = ? AND meal = ? AND name = ? "
+                "AND nutrient_hash = ? AND water_pending = 1 ORDER BY logged_at LIMIT 1)",
+                key,
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to mark water as recorded in history: {e}")
+
+def split_already_logged(account, food_items):
+    """
+    Split food items into (to_log, already_present, water_pending) using the
+    history store. water_pending holds items whose food was saved but whose
+    water update failed, so only the water still has to be added.
+
+    Identical items are matched by count, so pasting the same drink twice
+    skips it only as many times as it was logged before.
+    """
+    if not SKIP_ALREADY_LOGGED:
+        return list(food_items), [], []
+    keys = [item_key(account, item) for item in food_items]
+    try:
+        with closing(_connect()) as conn:
+            done, pending = Counter(), Counter()
+            for key in set(k for k in keys if k):
+                (done[key], pending[key]) = conn.execute(
+                    "SELECT COALESCE(SUM(water_pending = 0), 0), COALESCE(SUM(water_pending = 1), 0) FROM logged_items "
+                    "WHERE account = ? AND date = ? AND meal = ? AND name = ? AND nutrient_hash = ?",
+                    key,
+                ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to read history store, logging every item: {e}")
+        return list(food_items), [], []
+
+    to_log, already_present, water_pending = [], [], []
+    for food_item, key in zip(food_items, keys):
+        if key and done[key] > 0:
+            done[key] -= 1
+            already_present.append(food_item)
+        elif key and pending[key] > 0:
+            pending[key] -= 1
+            water_pending.append(food_item)
+        else:
+            to_log.append(food_item)
+    return to_log, already_present, water_pending
@@ -0,0 +1,100 @@
+# scripts/instrumentation.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+import sentry_sdk
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("instrumentation")
+
+_listeners = []
+_local = threading.local()
+
+def add_stage_listener(listener):
+    """
+    Register listener(name, seconds, tags, error) to be called whenever a
+    stage finishes in any thread.
+    """
+    _listeners.append(listener)
+
+def remove_stage_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def add_thread_stage_listener(listener):
+    """Register a listener that only sees stages run by the current thread."""
+    listeners = getattr(_local, "listeners", None)
+    if listeners is None:
+        listeners = _local.listeners = []
+    listeners.append(listener)
+
+def remove_thread_stage_listener(listener):
+    listeners = getattr(_local, "listeners", ())
+    if listener in listeners:
+        listeners.remove(listener)
+
+@contextmanager
+def thread_stage_listener(listener):
+    """Register a thread-local listener for the duration of the block."""
+    add_thread_stage_listener(listener)
+    try:
+        yield
+    finally:
+        remove_thread_stage_listener(listener)
+
+def annotate_stage(**tags):
+    """Attach tags to the innermost running stage of this thread, e.g. once parsing has counted the items."""
+    stack = getattr(_local, "stages", None)
+    if not stack:
+        return
+    stage_tags, span = stack[-1]
+    stage_tags.update(tags)
+    for key, value in tags.items():
+        span.set_tag(key, str(value))
+
+def fail_stage():
+    """
+    Mark the innermost running stage of this thread as failed, for steps that
+    report failure by returning False instead of raising. Listeners see it as
+    tags["result"] == "failed".
+    """
+    stack = getattr(_local, "stages", None)
+    if not stack:
+        return
+    annotate_stage(result="failed")
+    stack[-1][1].set_status("internal_error")
+
+@contextmanager
+def stage(name, **tags):
+    """
+    Time one pipeline stage, record it as a Sentry span and report it to the
+    registered listeners. Spans are only sent when the surrounding
+    transaction was sampled.
+    """
+    stack = getattr(_local, "stages", None)
+    if stack is None:
+        stack = _local.stages = []
+    with sentry_sdk.start_span(op=f"foodlog.{name}", name=name) as span:
+        for key, value in tags.items():
+            span.set_tag(key, str(value))
+        stack.append((tags, span))
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            span.set_status("internal_error")
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            logger.debug(f"Stage '{name}' took {seconds:.3f} seconds.")
+            for listener in list(_listeners) + list(getattr(_local, "listeners", ())):
+                try:
+                    listener(name, seconds, tags, error)
+                except Exception as e:
+                    logger.warning(f"Stage listener failed for '{name}': {e}")
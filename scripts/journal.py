@@ -0,0 +1,151 @@
+# scripts/journal.py
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("journal")
+
+JOURNAL_DIR = os.getenv('JOURNAL_DIR', os.path.join('logs', 'journal'))
+# Finished journals hold the full log text, so only the newest are kept; unfinished ones stay for resume
+JOURNAL_MAX_FINISHED = int(os.getenv('JOURNAL_MAX_FINISHED', '20'))
+
+# Events written to a job journal, in the order they happen for an item
+JOB_STARTED = "job_started"
+FOOD_SAVED = "food_saved"
+WATER_PENDING = "water_pending"
+WATER_RECORDED = "water_recorded"
+JOB_FINISHED = "job_finished"
+
+class JobJournal:
+    """
+    Append-only record of the steps a job has completed.
+
+    Every entry is flushed and fsynced before the step it follows is treated
+    as done, so a job interrupted by a crash or restart can be resumed from
+    its last committed step. Water updates are a read-modify-write, so the
+    values before and after are written ahead of the Record click.
+    """
+
+    def __init__(self, job_id, entries=None):
+        self.job_id = job_id
+        self.path = os.path.join(JOURNAL_DIR, f"{job_id}.jsonl")
+        self._entries = list(entries or [])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, log_text, log_water, account, job_id=None):
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        _prune_finished_jobs()
+        journal = cls(job_id or uuid.uuid4().hex)
+        journal.record(JOB_STARTED, log_text=log_text, log_water=log_water, account=account)
+        logger.info(f"Started job journal {journal.path}")
+        return journal
+
+    @classmethod
+    def load(cls, job_id):
+        path = os.path.join(JOURNAL_DIR, f"{job_id}.jsonl")
+        if not os.path.exists(path):
+            return None
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line means the step it describes never committed
+                    logger.warning(f"Ignoring incomplete journal entry in {path}")
+        return cls(job_id, entries)
+
+    def record(self, event, item=None, **data):
+        entry = {"event": event, "item": item, "time": time.time(), **data}
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries.append(entry)
+
+    @property
+    def header(self):
+        return next((entry for entry in self._entries if entry["event"] == JOB_STARTED), {})
+
+    @property
+    def finished(self):
+        return any(entry["event"] == JOB_FINISHED for entry in self._entries)
+
+    @property
+    def failed_items(self):
+        """Items the finished job did not log completely, or None while it is unfinished."""
+        finished = next((entry for entry in reversed(self._entries) if entry["event"] == JOB_FINISHED), None)
+        return finished.get("failed_items", 0) if finished else None
+
+    def item_steps(self, item):
+        """Latest entry of each event recorded for one item."""
+        with self._lock:
+            return {entry["event"]: entry for entry in self._entries if entry["item"] == item}
+
+def incomplete_jobs():
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    journals = []
+    for filename in sorted(os.listdir(JOURNAL_DIR)):
+        if filename.endswith(".jsonl"):
+            journal = JobJournal.load(filename[:-len(".jsonl")])
+            if journal and not journal.finished:
+                journals.append(journal)
+    return journals
+
+def _prune_finished_jobs():
+    try:
+        paths = [
+            os.path.join(JOURNAL_DIR, name) for name in os.listdir(JOURNAL_DIR)
+            if name.endswith(".jsonl")
+        ]
+    except OSError:
+        return
+    finished = []
+    for path in paths:
+        journal = JobJournal.load(os.path.basename(path)[:-len(".jsonl")])
+        if journal and journal.finished:
+            finished.append(path)
+    finished.sort(key=os.path.getmtime)
+    for path in finished[:-JOURNAL_MAX_FINISHED] if JOURNAL_MAX_FINISHED > 0 else finished:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def resume_job(job_id):
+    """Re-run an interrupted job, skipping every step its journal already committed."""
+    journal = JobJournal.load(job_id)
+    if not journal:
+        raise ValueError(f"No journal found for job {job_id}")
+    if journal.finished:
+        logger.info(f"Job {job_id} already finished. Nothing to resume.")
+        return "Job already finished."
+    from scripts.main import main
+    header = journal.header
+    logger.info(f"Resuming job {job_id}.")
+    return main(header["log_text"], header.get("log_water", True), job_id=job_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and resume interrupted food logging jobs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List jobs that did not finish")
+    resume_parser = subparsers.add_parser("resume", help="Resume an interrupted job")
+    resume_parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for journal in incomplete_jobs():
+            started = journal.header.get("time", 0)
+            print(f"{journal.job_id}  started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))}")
+    else:
+        print(resume_job(args.job_id))
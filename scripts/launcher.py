@@ -0,0 +1,111 @@
+# scripts/launcher.py
+
+import threading
+
+from scripts.errors import LoggingError
+from scripts.instrumentation import fail_stage, stage
+from scripts.logging_setup import get_logger
+from scripts.login import initialize_driver, login, verify_login, quit_driver
+
+logger = get_logger("launcher")
+
+class DriverLauncher:
+    """
+    Starts Chrome and logs in on a background thread. Login starts as soon as
+    the driver is up.
+
+    wait() returns the logged-in driver or raises LoggingError. A launch that
+    fails after Chrome started quits the browser itself. cancel() is checked
+    after every launch phase, so an abandoned launch quits Chrome as soon as
+    the running phase returns instead of logging in first.
+    """
+
+    def __init__(self, headless, email, password):
+        self._headless = headless
+        self._email = email
+        self._password = password
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._cancelled = False
+        self._driver = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="driver-launch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        driver = None
+        network = None
+        try:
+            with stage("driver_start"):
+                driver = initialize_driver(headless=self._headless)
+            # Login and verification requests belong to their own stages, not the first item's
+            network = getattr(driver, "network_capture", None)
+            if network:
+                network.listen(pending_stage="driver_start")
+            if self._abandoned(driver):
+                return
+            with stage("login"):
+                logged_in = login(driver, self._email, self._password)
+                if not logged_in:
+                    fail_stage()
+            if not logged_in:
+                raise LoggingError("<span style='color: red;'>Login failed.</span>")
+            if self._abandoned(driver):
+                return
+            with stage("verify_login"):
+                verified = verify_login(driver)
+                if not verified:
+                    fail_stage()
+            if not verified:
+                raise LoggingError("<span style='color: red;'>Login verification failed.</span>")
+        except Exception as e:
+            error = e
+            if not isinstance(e, LoggingError):
+                logger.error(f"Failed to start the browser session: {e}", exc_info=True)
+                error = LoggingError(f"An unexpected error occurred: {e}")
+                error.__cause__ = e
+            if driver is not None:
+                quit_driver(driver)
+            self._finish(None, error)
+        else:
+            self._finish(driver, None)
+        finally:
+            if network:
+                network.unlisten()
+
+    def _abandoned(self, driver):
+        """Quit the driver and return True when the launch was cancelled."""
+        with self._lock:
+            cancelled = self._cancelled
+        if cancelled and driver is not None:
+            logger.info("Browser launch was cancelled; closing Chrome.")
+            quit_driver(driver)
+        return cancelled
+
+    def _finish(self, driver, error):
+        with self._lock:
+            if self._cancelled:
+                if driver is not None:
+                    logger.info("Browser session is no longer needed; closing it.")
+                    quit_driver(driver)
+                return
+            self._driver = driver
+            self._error = error
+            self._ready.set()
+
+    def wait(self):
+        self._ready.wait()
+        if self._error:
+            raise self._error
+        return self._driver
+
+    def cancel(self):
+        """Give up on the session without waiting for Chrome to finish starting."""
+        with self._lock:
+            self._cancelled = True
+            driver, self._driver = self._driver, None
+        if driver is not None:
+            quit_driver(driver)
@@ -0,0 +1,100 @@
+# scripts/locators.py
+
+"""
+Selectors for the Lose It! pages.
+
+Lookups use CSS class, ID and attribute selectors, which the browser answers
+from its selector indexes. Where an element can only be recognized by its text,
+a short script narrows the search with CSS first and compares text only on
+those candidates. Document-wide XPath text() scans walk every node of the large
+GWT DOM and are avoided. scripts/test/bench_selectors.py compares both on a
+copy of the diary page.
+"""
+
+from selenium.webdriver.common.by import By
+
+# Diary page
+DATE_HEADER = (By.CSS_SELECTOR, "div.GNOSQVDBIYB, div.GMQI3OOBIYB")
+NEXT_DAY_BUTTON = (By.CSS_SELECTOR, "div.nextArrowButton, div[role='button'][title='Next']")
+PREVIOUS_DAY_BUTTON = (By.CSS_SELECTOR, "div.prevArrowButton, div[role='button'][title='Previous']")
+FIXED_GLASS = (By.CSS_SELECTOR, "div.fixedGlass")
+MEAL_TABINDEX = {
+    "Breakfast": "200",
+    "Lunch": "300",
+    "Dinner": "400",
+    "Snacks": "500",
+}
+
+# Custom food dialog
+BRAND_INPUT = (By.CSS_SELECTOR, "input[tabindex='1004']")
+ADD_FOOD_BUTTON = (By.CSS_SELECTOR, "div.addFoodToLog[tabindex='1020']")
+
+# Water goals page
+WATER_PREVIOUS_DAY_BUTTON = (By.CSS_SELECTOR, "div[title='Previous']")
+WATER_INPUT = (By.CSS_SELECTOR, "input.GCJ-IGUKWC[type='text']")
+WATER_RECORD_BUTTON = (By.CSS_SELECTOR, "div.recordButton")
+
+# Login page
+LOGIN_SUBMIT_BUTTON = (By.CSS_SELECTOR, "button[type='submit']")
+
+def meal_input(meal_name):
+    """The search box of a meal; unknown meals fall back to Dinner like the original lookup."""
+    return (By.CSS_SELECTOR, f"input[tabindex='{MEAL_TABINDEX.get(meal_name, '400')}']")
+
+# The obfuscated GWT class of the date header changes between releases. The
+# fallback recognizes the header by its text, e.g. "Monday Oct 19, 2026", among
+# gwt-HTML divs only.
+DATE_HEADER_SCRIPT = """
+const known = document.querySelector(arguments[0]);
+if (known) { return known; }
+const pattern = /^[A-Z][a-z]+day [A-Z][a-z]+\\.? \\d{1,2}, \\d{4}$/;
+for (const element of document.querySelectorAll('div.gwt-HTML')) {
+    if (element.childElementCount === 0 && pattern.test(element.textContent.trim())) { return element; }
+}
+return null;
+"""
+
+# First element matching a CSS selector whose normalized text equals the given text
+TEXT_MATCH_SCRIPT = """
+const [selector, text] = arguments;
+for (const element of document.querySelectorAll(selector)) {
+    if (element.textContent.replace(/\\s+/g, ' ').trim() === text) { return element; }
+}
+return null;
+"""
+
+# All visible close buttons of dialogs and popups, in one round trip
+OVERLAY_CLOSE_SCRIPT = """
+const buttons = new Set(document.querySelectorAll("div[role='button'][title='Close']"));
+for (const button of document.querySelectorAll('button')) {
+    if (button.textContent.includes('Close')) { buttons.add(button); }
+}
+return Array.from(buttons).filter(button => button.offsetParent !== null);
+"""
+
+CREATE_CUSTOM_FOOD_SELECTOR = "div.gwt-HTML"
+CREATE_CUSTOM_FOOD_TEXT = "Create a custom food"
+
+def find_date_header(driver):
+    return driver.execute_script(DATE_HEADER_SCRIPT, DATE_HEADER[1])
+
+def find_by_text(driver, selector, text):
+    return driver.execute_script(TEXT_MATCH_SCRIPT, selector, text)
+
+def find_create_custom_food(driver):
+    return find_by_text(driver, CREATE_CUSTOM_FOOD_SELECTOR, CREATE_CUSTOM_FOOD_TEXT)
+
+def find_overlay_close_buttons(driver):
+    return driver.execute_script(OVERLAY_CLOSE_SCRIPT) or []
+
+def clickable(finder):
+    """
+    WebDriverWait condition for an element found by a script: returns it once it
+    is displayed and enabled, like EC.element_to_be_clickable.
+    """
+    def condition(driver):
+        element = finder(driver)
+        if element is not None and element.is_displayed() and element.is_enabled():
+            return element
+        return False
+    return condition
@@ -1,30 +1,154 @@
 # scripts/logging_setup.py
 
+import atexit
 import logging
 import os
+import queue
+import re
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+# Rotate a log file when it reaches LOG_MAX_BYTES or at LOG_ROTATE_WHEN, whichever comes first
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', 'midnight')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '7'))
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+# Selenium and urllib3 log every WebDriver round trip at DEBUG
+NOISY_LOGGERS = ("selenium", "urllib3", "WDM")
+
+_listener = None
+_configure_lock = threading.Lock()
+_module_names = set()
+
+def _default_level(env):
+    return "DEBUG" if env == "dev" else "INFO"
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """TimedRotatingFileHandler that also rolls over once the file exceeds max_bytes."""
+
+    def __init__(self, filename, max_bytes, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+        # Size rollovers can happen several times a day, so backups are named down to the second
+        self.suffix = "%Y-%m-%d_%H-%M-%S"
+        self.extMatch = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(\.\d+)?$", re.ASCII)
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            self.stream.seek(0, 2)
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        suffix = time.strftime(self.suffix, time.localtime())
+        target = self.rotation_filename(f"{self.baseFilename}.{suffix}")
+        counter = 1
+        while os.path.exists(target):
+            target = self.rotation_filename(f"{self.baseFilename}.{suffix}.{counter}")
+            counter += 1
+        if os.path.exists(self.baseFilename):
+            self.rotate(self.baseFilename, target)
+        for old in self.getFilesToDelete():
+            os.remove(old)
+        self.stream = self._open()
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+class ModuleFileHandler(logging.Handler):
+    """
+    Writes each record to logs/<module>.log, keeping the one file per module
+    layout of get_logger(). Records from other libraries go to logs/app.log.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self._directory = directory
+        self._handlers = {}
+
+    def _file_name(self, logger_name):
+        if logger_name in _module_names:
+            return logger_name
+        short_name = logger_name.rsplit(".", 1)[-1]
+        return short_name if short_name in _module_names else "app"
+
+    def emit(self, record):
+        name = self._file_name(record.name)
+        handler = self._handlers.get(name)
+        if handler is None:
+            handler = SizedTimedRotatingFileHandler(
+                os.path.join(self._directory, f"{name}.log"),
+                LOG_MAX_BYTES,
+                when=LOG_ROTATE_WHEN,
+                backupCount=LOG_BACKUP_COUNT,
+                encoding='utf-8',
+            )
+            handler.setFormatter(self.formatter)
+            self._handlers[name] = handler
+        handler.handle(record)
+
+    def close(self):
+        for handler in self._handlers.values():
+            handler.close()
+        super().close()
+
+def configure_logging(env=None):
+    """
+    Install the process-wide logging configuration once.
+
+    Loggers only put records on a queue; a background QueueListener thread
+    formats them and writes them to the console and the rotating files, so a
+    Selenium step never waits on disk or terminal I/O. Levels come from
+    LOG_LEVEL and LOG_CONSOLE_LEVEL, defaulting to DEBUG in dev and INFO
+    everywhere else.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        env = (env or os.getenv('ENV', 'dev')).lower()
+        level = os.getenv('LOG_LEVEL', _default_level(env)).upper()
+        console_level = os.getenv('LOG_CONSOLE_LEVEL', level).upper()
+        os.makedirs(LOG_DIR, exist_ok=True)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        console = logging.StreamHandler()
+        console.setLevel(console_level)
+        console.setFormatter(formatter)
+        files = ModuleFileHandler(LOG_DIR)
+        files.setLevel(level)
+        files.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(level)
+        for name in NOISY_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _listener = QueueListener(log_queue, console, files, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush the queue and close the files. Called at exit."""
+    global _listener
+    with _configure_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 def get_logger(name):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)  # Set to DEBUG to capture all levels of logs
-
-    # Create handlers if they don't already exist
-    if not logger.handlers:
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.DEBUG)
-
-        # File handler
-        log_file = os.path.join('logs', f'{name}.log')
-        fh = logging.FileHandler(log_file)
-        fh.setLevel(logging.DEBUG)
-
-        # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
-        ch.setFormatter(formatter)
-        fh.setFormatter(formatter)
-
-        # Add handlers to logger
-        logger.addHandler(ch)
-        logger.addHandler(fh)
-
-    return logger
+    configure_logging()
+    _module_names.add(name)
+    return logging.getLogger(name)
@@ -2,7 +2,8 @@
 
 import logging
 import os
-import time
+import tempfile
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -16,9 +17,109 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from scripts.logging_setup import get_logger
+from scripts.waits import wait_for
+from scripts.locators import LOGIN_SUBMIT_BUTTON
+from scripts.webdriver_trace import CommandTracer, TRACE_WEBDRIVER
+from scripts.browser_lifecycle import create_profile, release
+from scripts.element_cache import ELEMENT_CACHE, ElementCache
+from scripts.network_capture import CAPTURE_NETWORK, NetworkCapture, enable_performance_log
 
 logger = get_logger("login")
 
+# Overridable so the automation can run against a local stand-in for Lose It!
+LOSEIT_URL = os.getenv('LOSEIT_URL', 'https://www.loseit.com/')
+LOSEIT_LOGIN_URL = os.getenv('LOSEIT_LOGIN_URL', f'https://my.loseit.com/login?r={LOSEIT_URL}')
+
+LOSEIT_AUTH_COOKIE = os.getenv('LOSEIT_AUTH_COOKIE', 'liauth')
+LOGIN_TIMEOUT_SECONDS = 10
+LOGIN_POLL_SECONDS = 0.1
+# Current location plus any visible error next to the login form, in one round trip
+LOGIN_STATE_SCRIPT = """
+const form = document.querySelector('form');
+const scope = form ? (form.parentElement || form) : null;
+let error = null;
+if (scope) {
+    for (const element of scope.querySelectorAll('[role="alert"], [class*="error" i]')) {
+        const text = element.textContent.trim();
+        if (text && element.offsetParent !== null) { error = text; break; }
+    }
+}
+return {url: window.location.href, path: window.location.pathname, error: error};
+"""
+
+# Chrome's HTTP cache lives outside the throwaway profiles so the Lose It! bundle survives between jobs.
+# Chrome cannot share one cache directory between running browsers, so each gets its own slot.
+CHROME_CACHE_DIR = os.getenv('CHROME_CACHE_DIR', os.path.join(tempfile.gettempdir(), "foodlog_chrome_cache"))
+CHROME_CACHE_MB = int(os.getenv('CHROME_CACHE_MB', '200'))
+
+# "lean" trades features the automation never uses for a smaller memory footprint per browser
+BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'default').lower()
+LEAN_JS_HEAP_MB = int(os.getenv('LEAN_JS_HEAP_MB', '256'))
+LEAN_CHROME_ARGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-breakpad",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-accelerated-2d-canvas",
+    "--mute-audio",
+    "--metrics-recording-only",
+    "--no-first-run",
+    # Only Lose It! is ever open, so one renderer without per-site process isolation is enough
+    "--renderer-process-limit=1",
+    "--disable-features=site-per-process,IsolateOrigins,Translate,OptimizationHints,MediaRouter,BackForwardCache,AutofillServerCommunication",
+    f"--js-flags=--max-old-space-size={LEAN_JS_HEAP_MB}",
+]
+
+# Counts resources of the current page that were served without a network transfer.
+# Cross-origin resources without Timing-Allow-Origin report no sizes and are left out.
+CACHE_STATS_SCRIPT = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+let resources = 0, cached = 0, transferred = 0;
+for (const entry of entries) {
+    if (!entry.decodedBodySize) continue;
+    resources++;
+    if (entry.transferSize === 0) cached++; else transferred += entry.transferSize;
+}
+return {resources: resources, cached: cached, transferred_bytes: transferred};
+"""
+
+_cache_slots_lock = threading.Lock()
+_cache_slots = set()
+
+def _acquire_cache_slot():
+    with _cache_slots_lock:
+        slot = 0
+        while slot in _cache_slots:
+            slot += 1
+        _cache_slots.add(slot)
+    return slot
+
+def _release_cache_slot(slot):
+    with _cache_slots_lock:
+        _cache_slots.discard(slot)
+
+def browser_cache_stats(driver):
+    try:
+        return driver.execute_script(CACHE_STATS_SCRIPT)
+    except WebDriverException as e:
+        logger.debug(f"Could not read resource timings: {e}")
+        return None
+
+def format_cache_stats(stats):
+    if not stats or not stats.get("resources"):
+        return "Browser cache: no resource timings available"
+    rate = stats["cached"] / stats["resources"] * 100
+    return (
+        f"Browser cache: {stats['cached']} of {stats['resources']} resources served from the disk cache "
+        f"({rate:.0f}%), {stats['transferred_bytes'] / 1024:.0f} KB downloaded"
+    )
+
 def initialize_driver(headless=False): # Change to False to run with visible Chrome, change to True to run without visible Chrome
     try:
         logger.info(f"Initializing Chrome driver with headless={headless}")
@@ -40,6 +141,11 @@ def initialize_driver(headless=False): # Change to False to run with visible Chr
             chrome_options.add_argument("--disable-renderer-backgrounding")
             logger.info("Running in headed mode.")
 
+        if BROWSER_PROFILE == "lean":
+            for argument in LEAN_CHROME_ARGS:
+                chrome_options.add_argument(argument)
+            logger.info("Using the lean browser profile.")
+
         # Mimic normal browser behavior
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_argument(
@@ -50,14 +156,6 @@ def initialize_driver(headless=False): # Change to False to run with visible Chr
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
-        # Use a unique Chrome profile for each session to avoid conflicts
-        import tempfile
-        import uuid
-        temp_dir = tempfile.mkdtemp(prefix="chrome_profile_")
-        chrome_options.add_argument(f"--user-data-dir={temp_dir}")
-        chrome_options.add_argument("--profile-directory=temp_profile")
-        logger.info(f"Using temporary Chrome profile: {temp_dir}")
-
         # **Add the following preferences to disable password saving prompts**
         prefs = {
             "credentials_enable_service": False,
@@ -66,6 +164,9 @@ def initialize_driver(headless=False): # Change to False to run with visible Chr
         chrome_options.add_experimental_option("prefs", prefs)
         logger.debug("Disabled Chrome password manager.")
 
+        if CAPTURE_NETWORK:
+            enable_performance_log(chrome_options)
+
         chrome_binary = os.getenv("GOOGLE_CHROME_SHIM")
         chromedriver_path = os.getenv("CHROMEDRIVER_PATH")
 
@@ -89,21 +190,53 @@ def initialize_driver(headless=False): # Change to False to run with visible Chr
             service = Service(executable_path=chromedriver_path)
             logger.info("ChromeDriver service created successfully.")
 
+        # Use a unique Chrome profile for each session to avoid conflicts; it is deleted when the browser is released
+        record = create_profile()
+        temp_dir = record.profile_dir
+        chrome_options.add_argument(f"--user-data-dir={temp_dir}")
+        chrome_options.add_argument("--profile-directory=temp_profile")
+        logger.info(f"Using temporary Chrome profile: {temp_dir}")
+
+        # Cookies and session state stay in the temporary profile; only the HTTP cache is shared
+        cache_slot = None
+        if CHROME_CACHE_MB > 0:
+            cache_slot = _acquire_cache_slot()
+            record.on_release = lambda: _release_cache_slot(cache_slot)
+            cache_dir = os.path.join(CHROME_CACHE_DIR, f"slot-{cache_slot}")
+            chrome_options.add_argument(f"--disk-cache-dir={cache_dir}")
+            chrome_options.add_argument(f"--disk-cache-size={CHROME_CACHE_MB * 1024 * 1024}")
+            logger.info(f"Using shared Chrome disk cache: {cache_dir}")
+
         logger.info("Creating Chrome WebDriver instance...")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        logger.info("Chrome WebDriver instance created successfully.")
-
-        # Prevent detection as bot
-        driver.execute_cdp_cmd(
-            "Page.addScriptToEvaluateOnNewDocument",
-            {
-                "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                  get: () => undefined
-                })
-                """
-            },
-        )
+        try:
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            record.attach(service, driver)
+            driver.browser_record = record
+            logger.info("Chrome WebDriver instance created successfully.")
+            if TRACE_WEBDRIVER:
+                CommandTracer().install(driver)
+            if CAPTURE_NETWORK:
+                NetworkCapture().install(driver)
+            if ELEMENT_CACHE:
+                ElementCache().install(driver)
+
+            # Prevent detection as bot
+            driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {
+                    "source": """
+                    Object.defineProperty(navigator, 'webdriver', {
+                      get: () => undefined
+                    })
+                    """
+                },
+            )
+        except BaseException:
+            # Chrome may already be running, so its processes and profile must not outlive this failure
+            if record.driver is None:
+                record.attach(service)
+            release(record)
+            raise
 
         logger.info("Chrome WebDriver initialized successfully.")
         return driver
@@ -112,46 +245,33 @@ def initialize_driver(headless=False): # Change to False to run with visible Chr
         logger.error(f"Failed to initialize Chrome WebDriver: {e}", exc_info=True)
         raise RuntimeError("Chrome WebDriver initialization failed")
 
+def quit_driver(driver):
+    release(driver.browser_record)
+
 def login(driver, email, password):
     try:
-        login_url = "https://my.loseit.com/login?r=https://www.loseit.com/"
-        driver.get(login_url)
+        driver.get(LOSEIT_LOGIN_URL)
         logger.info("Navigated to Lose It! login page.")
 
-        email_input = WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.ID, 'email'))
-        )
+        email_input = wait_for(driver, "login_email", EC.visibility_of_element_located((By.ID, 'email')), 10)
         logger.info("Email input field verified.")
         email_input.clear()
         email_input.send_keys(email)
         logger.info("Entered email.")
 
-        password_input = WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.ID, 'password'))
-        )
+        password_input = wait_for(driver, "login_password", EC.visibility_of_element_located((By.ID, 'password')), 10)
         password_input.clear()
         password_input.send_keys(password)
         logger.info("Entered password.")
 
-        login_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']"))
-        )
+        login_button = wait_for(driver, "login_submit", EC.element_to_be_clickable(LOGIN_SUBMIT_BUTTON), 10)
         login_button.click()
         logger.info("Clicked login button.")
-        
-        # Wait a moment for the login process to start
-        time.sleep(2)
-        
-        # Check if there are any error messages
-        try:
-            error_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'error') or contains(text(), 'Error') or contains(text(), 'invalid') or contains(text(), 'Invalid')]")
-            if error_elements:
-                for error in error_elements:
-                    if error.is_displayed():
-                        logger.warning(f"Login error message found: {error.text}")
-        except:
-            pass
-        
+
+        logged_in = wait_for_login_result(driver)
+        if logged_in is False:
+            return False
+        # Undecided within the timeout: let verify_login() make the final call
         return True
 
     except TimeoutException:
@@ -167,8 +287,47 @@ def login(driver, email, password):
         logger.error(f"An unexpected error occurred during login: {e}", exc_info=True)
         return False
 
+def check_login_state(driver):
+    """
+    One fast look at the authoritative login signals: True once the login
+    page redirected away or the auth cookie is set, False when the login form
+    shows an error while still on /login, None while undecided.
+    """
+    state = driver.execute_script(LOGIN_STATE_SCRIPT)
+    if "/login" not in state["path"]:
+        logger.info(f"Login verified. Redirected to: {state['url']}")
+        return True
+    if driver.get_cookie(LOSEIT_AUTH_COOKIE):
+        logger.info(f"Login verified. Auth cookie '{LOSEIT_AUTH_COOKIE}' is set.")
+        return True
+    # Only an error on the login page itself means the credentials were refused
+    if state["error"]:
+        logger.warning(f"Login error message found: {state['error']}")
+        return False
+    return None
+
+def _decided_login_state(driver):
+    # until() only stops on a truthy value, so a decided False is wrapped in a tuple
+    state = check_login_state(driver)
+    return None if state is None else (state,)
+
+def wait_for_login_result(driver, timeout=LOGIN_TIMEOUT_SECONDS):
+    """Poll check_login_state() until it decides or the timeout passes; returns True, False or None."""
+    try:
+        decided = wait_for(driver, "login_result", _decided_login_state, timeout, poll=LOGIN_POLL_SECONDS)
+        return decided[0]
+    except TimeoutException:
+        logger.warning(f"Login outcome undecided after {timeout} seconds.")
+        return None
+
 def verify_login(driver):
     try:
+        # The redirect or auth cookie normally settles this in one round trip
+        state = check_login_state(driver)
+        if state is not None:
+            return state
+
+        logger.info("Falling back to the page-based login verification.")
         # Wait for page to load after login
         WebDriverWait(driver, 10).until(
             lambda d: d.execute_script("return document.readyState") == "complete"
@@ -20,8 +20,10 @@ LOSEIT_EMAIL = os.getenv('LOSEIT_EMAIL')
 LOSEIT_PASSWORD = os.getenv('LOSEIT_PASSWORD')
 HEADLESS_MODE = os.getenv('HEADLESS_MODE', 'False').lower() == 'true'
 
-from scripts.login import initialize_driver, login, verify_login
+from scripts.login import quit_driver, browser_cache_stats, format_cache_stats
+from scripts.launcher import DriverLauncher
 from scripts.navigation import (
+    DiaryPosition,
     parse_food_item_date,
     navigate_to_date,
     close_overlays,
@@ -32,65 +34,235 @@ from scripts.navigation import (
 )
 from scripts.food_entry import enter_food_details, save_food
 from scripts.water_intake import update_water_intake
+from scripts.element_cache import invalidate_elements
+from scripts.history import split_already_logged, record_logged_item
+from scripts.instrumentation import stage, annotate_stage, fail_stage
+from scripts.metrics import FAILED_ITEMS, PAGE_REFRESHES, WATER_UPDATES
+from scripts.screenshots import ScreenshotRecorder
+from scripts.errors import InvalidLogError, LoggingError
+from scripts.journal import JobJournal, FOOD_SAVED, WATER_RECORDED, JOB_FINISHED
 from scripts.utils import parse_food_items, compare_items, logger
 
-def main(log_text, log_water=True):
-    driver = initialize_driver(headless=HEADLESS_MODE)
+def main(log_text, log_water=True, job_id=None):
+    with stage("job"):
+        return _run_job(log_text, log_water, job_id)
+
+def _run_job(log_text, log_water, job_id):
     output_messages = []
     start_time = datetime.now()
 
-    try:
-        if not login(driver, LOSEIT_EMAIL, LOSEIT_PASSWORD):
-            output_messages.append("<span style='color: red;'>Login failed.</span>")
-            return "<br>".join(output_messages)
+    with stage("parse"):
+        food_items = parse_food_items(log_text, log_water=log_water)
+    num_items = len(food_items)
+    logger.info(f"Parsed {num_items} food items.")
+    annotate_stage(items=num_items, dates=",".join(sorted({str(item.get('Date')) for item in food_items})))
 
-        if not verify_login(driver):
-            output_messages.append("<span style='color: red;'>Login verification failed.</span>")
-            return "<br>".join(output_messages)
+    if not food_items:
+        output_messages.append("No food items to process.")
+        return "<br>".join(output_messages)
 
-        food_items = parse_food_items(log_text, log_water=log_water)
-        num_items = len(food_items)
-        logger.info(f"Parsed {num_items} food items.")
+    if not LOSEIT_EMAIL or not LOSEIT_PASSWORD:
+        raise LoggingError("<span style='color: red;'>LOSEIT_EMAIL and LOSEIT_PASSWORD must be set.</span>")
+
+    # Items that would fail in the browser are skipped; only a log with nothing valid is rejected
+    problems = validate_food_items(food_items)
+    if len(problems) == num_items:
+        raise InvalidLogError("<span style='color: red;'>" + "<br>".join(problems.values()) + "</span>")
+    invalid_items = [food_items[idx - 1] for idx in problems]
+    for idx, problem in problems.items():
+        logger.warning(f"Skipping invalid item: {problem}")
 
-        if not food_items:
-            output_messages.append("No food items to process.")
-            return "<br>".join(output_messages)
+    journal = JobJournal.load(job_id) if job_id else None
+    if journal:
+        logger.info(f"Resuming job {job_id} from its journal.")
+    else:
+        journal = JobJournal.create(log_text, log_water, LOSEIT_EMAIL, job_id=job_id)
+
+    # Items saved before an interruption are finished from the journal, not the history store
+    resumed_items = [item for idx, item in enumerate(food_items, 1) if FOOD_SAVED in journal.item_steps(idx)]
+    new_items = [
+        item for item in food_items
+        if not any(item is resumed for resumed in resumed_items) and not any(item is invalid for invalid in invalid_items)
+    ]
+
+    # Check the history store before any browser work so earlier successes are not logged again
+    items_to_log, present_items, water_pending_items = split_already_logged(LOSEIT_EMAIL, new_items)
+    if present_items:
+        logger.info(f"{len(present_items)} of {num_items} food items are already present in the diary.")
+    if water_pending_items:
+        logger.info(f"{len(water_pending_items)} food items were logged earlier but their water update is still missing.")
+    items_to_check = [
+        item for item in food_items
+        if not any(item is present for present in present_items) and not any(item is invalid for invalid in invalid_items)
+    ]
+    if not items_to_log and not any(needs_water_update(item) for item in resumed_items + water_pending_items):
+        for idx, food_item in enumerate(food_items, 1):
+            output_messages.append(f"<b style='color: #f9c74f;'>Logging item {idx} of {num_items}: {food_item.get('Food Name', 'Unknown')}</b>")
+            if idx in problems:
+                output_messages.append(f"<span style='color: red;'>{problems[idx]} Skipping.</span>")
+            else:
+                output_messages.append("Already present in the diary. Skipping.")
+        journal.record(JOB_FINISHED, failed_items=len(problems))
+        return "<br>".join(output_messages)
+
+    # Planning is local and fast, so Chrome only starts once there is browser work to do
+    launcher = DriverLauncher(HEADLESS_MODE, LOSEIT_EMAIL, LOSEIT_PASSWORD).start()
+
+    try:
+        with stage("driver_wait"):
+            driver = launcher.wait()
+    except BaseException:
+        # An interrupted wait must not leave the launch running on its own
+        launcher.cancel()
+        raise
+    network = getattr(driver, "network_capture", None)
+
+    # Everything after wait() runs inside the try so a failure still releases the browser
+    try:
+        screenshots = ScreenshotRecorder(journal.job_id).install(driver)
+        # The diary page has just loaded the Lose It! bundle, so its timings show how much came from the cache
+        cache_report = format_cache_stats(browser_cache_stats(driver))
+        logger.info(cache_report)
+        if network:
+            network.listen(pending_stage="driver_wait")
 
         logged_items = []
+        # Invalid items, items that could not be saved and saved items still missing their water
+        failed_items = len(problems)
+        position = DiaryPosition()
         for idx, food_item in enumerate(food_items, 1):
             output_messages.append(f"<b style='color: #f9c74f;'>Logging item {idx} of {num_items}: {food_item.get('Food Name', 'Unknown')}</b>")
+            if idx in problems:
+                output_messages.append(f"<span style='color: red;'>{problems[idx]} Skipping.</span>")
+                continue
+            if any(food_item is present for present in present_items):
+                output_messages.append("Already present in the diary. Skipping.")
+                continue
 
-            success = attempt_food_logging(driver, food_item)
-            if not success:
-                # Refresh and try again
-                driver.refresh()
-                time.sleep(3)
-                success = attempt_food_logging(driver, food_item)
+            driver.browser_record.check_memory_budget()
+            steps = journal.item_steps(idx)
+            # Saved by an interrupted run of this job, or by an earlier job whose water update failed
+            saved_earlier = FOOD_SAVED in steps or any(food_item is pending for pending in water_pending_items)
+            if saved_earlier:
+                if needs_water_update(food_item) and WATER_RECORDED not in steps:
+                    target_date = parse_food_item_date(food_item.get("Date"))
+                    with stage("water", date=target_date.isoformat()):
+                        water_logged = log_water_intake(driver, food_item, target_date, journal, idx)
+                        if not water_logged:
+                            fail_stage()
+                    position.reset()
+                    if water_logged:
+                        output_messages.append("Food was saved earlier. Completed the water update.")
+                    else:
+                        output_messages.append("<span style='color: red;'>Food was saved earlier, but the water update failed again.</span>")
+                else:
+                    food_item['fluid_ounces_added'] = float(food_item.get('fluid_ounces', 0.0)) if WATER_RECORDED in steps else 0.0
+                    output_messages.append("Logged earlier. Skipping.")
+                if needs_water_update(food_item) and WATER_RECORDED not in journal.item_steps(idx):
+                    failed_items += 1
+                logged_items.append(food_item)
+                continue
+
+            with stage("item", index=idx, date=food_item.get('Date'), meal=food_item.get('Meal')):
+                success = attempt_food_logging(driver, food_item, journal, idx, position)
+                if not success:
+                    # Refresh and try again
+                    PAGE_REFRESHES.labels(source="item_retry").inc()
+                    driver.refresh()
+                    invalidate_elements(driver)
+                    time.sleep(3)
+                    success = attempt_food_logging(driver, food_item, journal, idx, position)
                 if not success:
-                    output_messages.append("<span style='color: red;'>Failed to log this food item after refresh. Skipping.</span>")
-                    continue
+                    fail_stage()
+            if not success:
+                FAILED_ITEMS.inc()
+                failed_items += 1
+                output_messages.append("<span style='color: red;'>Failed to log this food item after refresh. Skipping.</span>")
+                continue
 
+            if needs_water_update(food_item) and WATER_RECORDED not in journal.item_steps(idx):
+                failed_items += 1
             logged_items.append(food_item)
             output_messages.append("Logged nutritional values")
 
+        journal.record(JOB_FINISHED, failed_items=failed_items)
+
         end_time = datetime.now()
         time_taken = (end_time - start_time).total_seconds()
         output_messages.append(f"<br>Time to Log: {time_taken:.2f} seconds")
+        output_messages.append(cache_report)
+        output_messages.append(driver.browser_record.format_memory_report())
+        element_cache = getattr(driver, "element_cache", None)
+        if element_cache and element_cache.format_report():
+            output_messages.append(element_cache.format_report())
 
-        comparison_output = compare_items(food_items, logged_items)
+        tracer = getattr(driver, "command_tracer", None)
+        if tracer:
+            browser_items = num_items - len(present_items) - len(invalid_items)
+            tracer.log_summary(browser_items)
+            output_messages.append("<br>" + tracer.format_report(browser_items))
+
+        screenshot_report = screenshots.format_report()
+        if screenshot_report:
+            output_messages.append("<br>" + screenshot_report)
+
+        if network and network.finish(journal.job_id):
+            output_messages.append(f"<br>Network capture: {network.path}")
+
+        comparison_output = compare_items(items_to_check, logged_items)
         output_messages.append("<br><b style='color: #f9c74f;'>Comparison Check:</b><br>" + comparison_output)
 
         return "<br>".join(output_messages)
 
+    except LoggingError:
+        raise
+
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}", exc_info=True)
-        return f"An unexpected error occurred: {e}"
+        raise LoggingError(f"An unexpected error occurred: {e}") from e
 
     finally:
-        driver.quit()
+        if network:
+            network.finish(journal.job_id)
+        quit_driver(driver)
         logger.info("WebDriver closed.")
 
-def attempt_food_logging(driver, food_item):
+def validate_food_items(food_items):
+    """Problems that would make items fail in the browser, as {item index: message}."""
+    problems = {}
+    for idx, food_item in enumerate(food_items, 1):
+        name = food_item.get('Food Name')
+        date_str = food_item.get("Date")
+        if not name:
+            problems[idx] = f"Item {idx} has no Food Name."
+        elif not date_str:
+            problems[idx] = f"Item {idx} ({name}) has no Date."
+        elif parse_food_item_date(date_str) is None:
+            problems[idx] = f"Item {idx} ({name}) has an invalid Date '{date_str}'."
+    return problems
+
+def needs_water_update(food_item):
+    return bool(food_item.get('fluid_ounces') and food_item.get('log_water', True))
+
+def attempt_food_logging(driver, food_item, journal=None, item_index=None, position=None):
+    """
+    Log one food item. With a DiaryPosition from the previous item, the date
+    navigation and the Breakfast baseline click are skipped when the diary is
+    already on the item's date and meal. The position is forgotten whenever
+    this returns False or raises, so the next attempt checks everything again
+    and first closes a dialog the failed attempt may have left open.
+    """
+    position = position or DiaryPosition()
+    try:
+        logged = _log_food_item(driver, food_item, journal, item_index, position)
+    except BaseException:
+        position.forget()
+        raise
+    if not logged:
+        position.forget()
+    return logged
+
+def _log_food_item(driver, food_item, journal, item_index, position):
     date_str = food_item.get("Date")
     if not date_str:
         logger.error("Date is missing for a food item.")
@@ -100,54 +272,112 @@ def attempt_food_logging(driver, food_item):
         logger.error(f"Invalid date: {date_str}")
         return False
 
-    if not navigate_to_date(driver, target_date):
-        logger.error(f"Failed to navigate to {target_date}.")
-        return False
-
-    # Always move cursor to the initial "Breakfast" position first
-    goto_initial_position(driver)
+    if position.dialog_open:
+        logger.info("A dialog may still be open from the previous attempt. Closing overlays.")
+        close_overlays(driver)
+        position.reset()
 
     meal_name = food_item.get("Meal", "Dinner")
-    search_input = select_search_box(driver, meal_name)
+    if position.date == target_date:
+        logger.info(f"Diary is still on {target_date}. Skipping date navigation.")
+    else:
+        position.reset()
+        with stage("navigate", date=target_date.isoformat()):
+            navigated = navigate_to_date(driver, target_date)
+            if not navigated:
+                fail_stage()
+        if not navigated:
+            logger.error(f"Failed to navigate to {target_date}.")
+            return False
+        position.date = target_date
+
+    if position.meal == meal_name:
+        logger.info(f"Cursor is still in the {meal_name} box. Skipping the initial position.")
+    else:
+        # Move cursor to the initial "Breakfast" position first
+        with stage("initial_position"):
+            goto_initial_position(driver)
+
+    # The handle is still needed to type into; on the same page it comes from the element cache
+    with stage("search_box", meal=meal_name):
+        search_input = select_search_box(driver, meal_name)
+        if not search_input:
+            fail_stage()
     if not search_input:
         logger.error(f"Failed to locate search box for {meal_name}.")
         return False
 
     placeholder_text = "pjzFqiRjygwY"
-    if not enter_placeholder_text(driver, search_input, placeholder_text):
+    position.dialog_open = True
+    with stage("placeholder"):
+        entered = enter_placeholder_text(driver, search_input, placeholder_text)
+        if not entered:
+            fail_stage()
+    if not entered:
         logger.error("Failed to enter placeholder text.")
         return False
 
-    if not click_create_custom_food(driver):
+    with stage("create_custom_food"):
+        clicked = click_create_custom_food(driver)
+        if not clicked:
+            fail_stage()
+    if not clicked:
         logger.error("Failed to click 'Create a custom food' button.")
         return False
 
-    if not enter_food_details(driver, food_item):
+    with stage("enter_details"):
+        entered = enter_food_details(driver, food_item)
+        if not entered:
+            fail_stage()
+    if not entered:
         logger.error("Failed to enter food details.")
         return False
 
-    if not save_food(driver):
+    with stage("save"):
+        saved = save_food(driver)
+        if not saved:
+            fail_stage()
+    if not saved:
         logger.error("Failed to save the food.")
         return False
 
+    if journal:
+        journal.record(FOOD_SAVED, item_index)
+    # Until the water update succeeds the item stays pending, so a resubmission only adds the water
+    record_logged_item(LOSEIT_EMAIL, food_item, water_pending=needs_water_update(food_item))
+
     close_overlays(driver)
+    position.dialog_open = False
+    position.meal = meal_name
 
-    if food_item.get('fluid_ounces') and food_item.get('log_water', True):
-        try:
-            days_difference_calculation = (target_date - date.today()).days
-            new_water_intake = update_water_intake(driver, food_item, days_difference_calculation)
-            if new_water_intake is None:
-                logger.error(f"Failed to update water intake for {food_item.get('Food Name', 'Unknown')}.")
-                food_item['fluid_ounces_added'] = 0.0
-            else:
-                fluid_oz = float(food_item.get('fluid_ounces', 0.0))
-                food_item['fluid_ounces_added'] = fluid_oz
-        except Exception as e:
-            logger.error(f"Error updating water intake: {e}")
-            food_item['fluid_ounces_added'] = 0.0
+    if needs_water_update(food_item):
+        with stage("water", date=target_date.isoformat()):
+            if not log_water_intake(driver, food_item, target_date, journal, item_index):
+                fail_stage()
+        # The water goals page is a different view; the diary reloads on the way back
+        position.reset()
     else:
         logger.info(f"No fluid ounces found or water logging disabled for: {food_item.get('Food Name', 'Unknown')}. Skipping water intake.")
         food_item['fluid_ounces_added'] = 0.0
 
     logger.info(f"Successfully logged food item: {food_item.get('Food Name', 'Unknown')}")
     return True
+
+def log_water_intake(driver, food_item, target_date, journal=None, item_index=None):
+    try:
+        days_difference_calculation = (target_date - date.today()).days
+        new_water_intake = update_water_intake(driver, food_item, days_difference_calculation, journal, item_index, LOSEIT_EMAIL)
+        if new_water_intake is None:
+            logger.error(f"Failed to update water intake for {food_item.get('Food Name', 'Unknown')}.")
+            WATER_UPDATES.labels(result="failure").inc()
+            food_item['fluid_ounces_added'] = 0.0
+            return False
+        fluid_oz = float(food_item.get('fluid_ounces', 0.0))
+        WATER_UPDATES.labels(result="success").inc()
+        food_item['fluid_ounces_added'] = fluid_oz
+        return True
+    except Exception as e:
+        logger.error(f"Error updating water intake: {e}")
+        WATER_UPDATES.labels(result="failure").inc()
+        food_item['fluid_ounces_added'] = 0.0
+        return False
@@ -0,0 +1,97 @@
+# scripts/metrics.py
+
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+from scripts.instrumentation import add_stage_listener
+from scripts.logging_setup import get_logger
+
+logger = get_logger("metrics")
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Browser steps take seconds to minutes, so the default sub-second buckets are of little use
+STEP_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, float("inf"))
+JOB_BUCKETS = (5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, float("inf"))
+
+JOB_DURATION = Histogram(
+    "foodlog_job_duration_seconds", "Wall time of a whole logging job.",
+    ["result"], buckets=JOB_BUCKETS,
+)
+ITEM_DURATION = Histogram(
+    "foodlog_item_duration_seconds", "Wall time of logging one food item, including its retry.",
+    ["result"], buckets=STEP_BUCKETS,
+)
+STEP_DURATION = Histogram(
+    "foodlog_step_duration_seconds", "Wall time of each step of attempt_food_logging().",
+    ["step", "result"], buckets=STEP_BUCKETS,
+)
+DRIVER_START_DURATION = Histogram(
+    "foodlog_driver_start_seconds", "Time to launch Chrome and chromedriver.",
+    buckets=STEP_BUCKETS,
+)
+LOGIN_DURATION = Histogram(
+    "foodlog_login_seconds", "Time spent logging in to Lose It! and verifying the session.",
+    ["phase"], buckets=STEP_BUCKETS,
+)
+BROWSER_PEAK_RSS = Histogram(
+    "foodlog_browser_peak_rss_megabytes", "Peak resident memory of a job's Chrome process tree.",
+    buckets=(128, 256, 384, 512, 768, 1024, 1536, 2048, float("inf")),
+)
+RETRIES = Counter(
+    "foodlog_retries_total", "Retries made by retry_on_failure, by wrapped function.",
+    ["function"],
+)
+PAGE_REFRESHES = Counter(
+    "foodlog_page_refreshes_total", "Page refreshes done to recover from a failed step.",
+    ["source"],
+)
+FAILED_ITEMS = Counter(
+    "foodlog_failed_items_total", "Food items that could not be logged after the refresh retry.",
+)
+WATER_UPDATES = Counter(
+    "foodlog_water_updates_total", "Water intake updates, by outcome.",
+    ["result"],
+)
+WAIT_DURATION = Histogram(
+    "foodlog_wait_seconds", "Time until a named WebDriver wait condition was met or timed out.",
+    ["condition", "result"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, float("inf")),
+)
+WAIT_TIMEOUT = Gauge("foodlog_wait_timeout_seconds", "Current timeout of each wait condition.", ["condition"])
+WAIT_POLL_INTERVAL = Gauge("foodlog_wait_poll_seconds", "Current polling interval of each wait condition.", ["condition"])
+ACTIVE_BROWSERS = Gauge("foodlog_active_browsers", "Chrome instances currently running.")
+QUEUE_DEPTH = Gauge("foodlog_queue_depth", "Jobs waiting in the scheduler queue.")
+
+STEPS = {
+    "navigate", "initial_position", "search_box", "placeholder",
+    "create_custom_food", "enter_details", "save", "water",
+}
+
+def _observe_stage(name, seconds, tags, error):
+    # Steps that return False instead of raising mark themselves with fail_stage()
+    result = "error" if error else tags.get("result", "ok")
+    if name == "job":
+        JOB_DURATION.labels(result=result).observe(seconds)
+    elif name == "item":
+        ITEM_DURATION.labels(result=result).observe(seconds)
+    elif name in STEPS:
+        STEP_DURATION.labels(step=name, result=result).observe(seconds)
+    elif name == "driver_start":
+        DRIVER_START_DURATION.observe(seconds)
+    elif name in ("login", "verify_login"):
+        LOGIN_DURATION.labels(phase=name).observe(seconds)
+
+add_stage_listener(_observe_stage)
+
+def track_active_browsers(counter):
+    """Report counter() as the active browser gauge at scrape time."""
+    ACTIVE_BROWSERS.set_function(counter)
+
+def track_queue_depth(counter):
+    """Report counter() as the queue depth gauge at scrape time."""
+    QUEUE_DEPTH.set_function(counter)
+
+def render_metrics():
+    """Return (body, content type) in the Prometheus text exposition format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -3,9 +3,7 @@
 import logging
 import time
 from datetime import datetime
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
@@ -13,32 +11,51 @@ from selenium.common.exceptions import (
     NoSuchElementException,
     StaleElementReferenceException,
 )
+from scripts.element_cache import cached_element
 from scripts.logging_setup import get_logger
+from scripts.locators import (
+    FIXED_GLASS,
+    NEXT_DAY_BUTTON,
+    PREVIOUS_DAY_BUTTON,
+    clickable,
+    find_create_custom_food,
+    find_date_header,
+    find_overlay_close_buttons,
+    meal_input,
+)
+from scripts.screenshots import capture_failure
+from scripts.waits import wait_for
 
 logger = get_logger("navigation")
 
+class DiaryPosition:
+    """
+    What the orchestrator knows about the diary page between items: the date
+    shown, the meal whose search box was used last and whether a dialog may
+    still be open. None means unknown; reset() after anything that reloads
+    the page, and forget() after a failure, which keeps dialog_open so the
+    next attempt closes a dialog the failed one left behind.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.date = None
+        self.meal = None
+        self.dialog_open = False
+
+    def forget(self):
+        self.date = None
+        self.meal = None
+
 def get_current_date(driver):
     try:
-        # Try multiple selectors for the current date element
-        date_selectors = [
-            (By.CLASS_NAME, "GNOSQVDBIYB"),  # Current dynamic class
-            (By.CLASS_NAME, "GMQI3OOBIYB"),  # Previous dynamic class
-            (By.XPATH, "//div[contains(@class, 'gwt-HTML') and contains(text(), ', 2025')]"),  # Generic pattern
-            (By.XPATH, "//div[contains(text(), ', 2025')]")  # Most generic
-        ]
-        
-        current_date_element = None
-        for selector_type, selector_value in date_selectors:
-            try:
-                current_date_element = WebDriverWait(driver, 3).until(
-                    EC.presence_of_element_located((selector_type, selector_value))
-                )
-                logger.info(f"Found date element using selector: {selector_type} = {selector_value}")
-                break
-            except TimeoutException:
-                continue
-        
-        if not current_date_element:
+        try:
+            current_date_element = cached_element(
+                driver, "date_header", lambda: wait_for(driver, "date_header", find_date_header, 5)
+            )
+        except TimeoutException:
             logger.error("Could not find current date element with any selector")
             return None
             
@@ -68,23 +85,25 @@ def parse_food_item_date(date_str):
 
 def close_overlays(driver):
     try:
-        overlay_selectors = [
-            "//div[@role='button' and @title='Close']",
-            "//button[contains(text(), 'Close')]",
-            "//div[contains(@class, 'overlay')]//button[contains(text(), 'Close')]"
-        ]
-        for selector in overlay_selectors:
-            buttons = driver.find_elements(By.XPATH, selector)
-            for btn in buttons:
-                try:
-                    btn.click()
-                    logger.info("Closed an overlay or popup.")
-                    time.sleep(1)  # Allow time for the overlay to close
-                except Exception as e:
-                    logger.error(f"Failed to click overlay close button: {e}")
+        for btn in find_overlay_close_buttons(driver):
+            try:
+                btn.click()
+                logger.info("Closed an overlay or popup.")
+                time.sleep(1)  # Allow time for the overlay to close
+            except Exception as e:
+                logger.error(f"Failed to click overlay close button: {e}")
     except Exception as e:
         logger.error(f"Error while closing overlays: {e}")
 
+def _date_changed(header, shown_text):
+    # The diary either re-renders the header (stale handle) or rewrites its text
+    def condition(driver):
+        try:
+            return header.text.strip() != shown_text
+        except StaleElementReferenceException:
+            return True
+    return condition
+
 def navigate_to_date(driver, target_date):
     max_attempts = 30
     attempts = 0
@@ -97,67 +116,40 @@ def navigate_to_date(driver, target_date):
         if current_date == target_date:
             logger.info(f"Already on the target date: {target_date}")
             return True
-        elif current_date < target_date:
+
+        try:
+            header = find_date_header(driver)
+            shown_text = header.text.strip() if header is not None else None
+        except StaleElementReferenceException:
+            header = None
+        clicked = False
+        if current_date < target_date:
             # Click 'Next Day' button
             try:
-                # Try multiple selectors for next button
-                next_selectors = [
-                    (By.XPATH, "//div[@role='button' and @title='Next']"),
-                    (By.XPATH, "//div[contains(@class, 'nextArrowButton')]"),
-                    (By.XPATH, "//div[contains(@class, 'nextArrowButton') and @role='button']"),
-                    (By.XPATH, "//div[@title='Next' and @role='button']")
-                ]
-                
-                next_button = None
-                for selector_type, selector_value in next_selectors:
-                    try:
-                        next_button = WebDriverWait(driver, 2).until(
-                            EC.element_to_be_clickable((selector_type, selector_value))
-                        )
-                        logger.info(f"Found next button using selector: {selector_type} = {selector_value}")
-                        break
-                    except TimeoutException:
-                        continue
-                
-                if next_button:
-                    next_button.click()
-                    logger.info("Clicked 'Next Day' button.")
-                else:
-                    logger.error("Could not find next button with any selector")
+                next_button = wait_for(driver, "next_day_button", EC.element_to_be_clickable(NEXT_DAY_BUTTON), 5)
+                next_button.click()
+                clicked = True
+                logger.info("Clicked 'Next Day' button.")
             except (TimeoutException, ElementClickInterceptedException) as e:
                 logger.error(f"Could not click 'Next Day' button: {e}")
                 close_overlays(driver)
         else:
             # Click 'Previous Day' button
             try:
-                # Try multiple selectors for previous button
-                prev_selectors = [
-                    (By.XPATH, "//div[@role='button' and @title='Previous']"),
-                    (By.XPATH, "//div[contains(@class, 'prevArrowButton')]"),
-                    (By.XPATH, "//div[contains(@class, 'prevArrowButton') and @role='button']"),
-                    (By.XPATH, "//div[@title='Previous' and @role='button']")
-                ]
-                
-                prev_button = None
-                for selector_type, selector_value in prev_selectors:
-                    try:
-                        prev_button = WebDriverWait(driver, 2).until(
-                            EC.element_to_be_clickable((selector_type, selector_value))
-                        )
-                        logger.info(f"Found previous button using selector: {selector_type} = {selector_value}")
-                        break
-                    except TimeoutException:
-                        continue
-                
-                if prev_button:
-                    prev_button.click()
-                    logger.info("Clicked 'Previous Day' button.")
-                else:
-                    logger.error("Could not find previous button with any selector")
+                prev_button = wait_for(driver, "previous_day_button", EC.element_to_be_clickable(PREVIOUS_DAY_BUTTON), 5)
+                prev_button.click()
+                clicked = True
+                logger.info("Clicked 'Previous Day' button.")
             except (TimeoutException, ElementClickInterceptedException) as e:
                 logger.error(f"Could not click 'Previous Day' button: {e}")
                 close_overlays(driver)
-        time.sleep(1)
+        if clicked and header is not None:
+            try:
+                wait_for(driver, "date_change", _date_changed(header, shown_text), 5)
+            except TimeoutException:
+                logger.warning("Date header did not change after the click.")
+        else:
+            time.sleep(1)
         attempts += 1
 
     logger.error(f"Failed to navigate to target date {target_date} after {max_attempts} attempts.")
@@ -170,10 +162,9 @@ def goto_initial_position(driver):
     """
     logger.info("Moving cursor to the initial 'Breakfast' search box (tabindex=200).")
     try:
-        breakfast_xpath = "//input[@tabindex='200']"
-        breakfast_input = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, breakfast_xpath))
-        )
+        breakfast_input = cached_element(driver, ("meal_input", "Breakfast"), lambda: wait_for(
+            driver, "meal_input", EC.element_to_be_clickable(meal_input("Breakfast")), 10
+        ))
         breakfast_input.click()
         logger.info("Cursor moved to the initial position (Breakfast box).")
     except Exception as e:
@@ -181,17 +172,9 @@ def goto_initial_position(driver):
 
 def select_search_box(driver, meal_name):
     try:
-        tabindex_map = {
-            "Breakfast": "200",
-            "Lunch": "300",
-            "Dinner": "400",
-            "Snacks": "500"
-        }
-        tabindex = tabindex_map.get(meal_name, "400")
-        search_input_xpath = f"//input[@tabindex='{tabindex}']"
-        search_input = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, search_input_xpath))
-        )
+        search_input = cached_element(driver, ("meal_input", meal_name), lambda: wait_for(
+            driver, "meal_input", EC.element_to_be_clickable(meal_input(meal_name)), 10
+        ))
         logger.info(f"Located search box for '{meal_name}'.")
         return search_input
     except (TimeoutException, StaleElementReferenceException) as e:
@@ -214,14 +197,12 @@ def enter_placeholder_text(driver, search_input, placeholder_text):
 
 def wait_for_fixed_glass_invisibility(driver):
     try:
-        WebDriverWait(driver, 10).until(
-            EC.invisibility_of_element_located((By.CLASS_NAME, "fixedGlass"))
-        )
+        wait_for(driver, "fixed_glass_gone", EC.invisibility_of_element_located(FIXED_GLASS), 10)
         logger.info("'fixedGlass' overlay is no longer visible.")
         return True
     except TimeoutException:
         logger.error("'fixedGlass' overlay is still visible after waiting.")
-        driver.save_screenshot("/tmp/fixed_glass_still_visible.png")
+        capture_failure(driver, "fixed_glass_still_visible")
         return False
 
 def click_create_custom_food(driver):
@@ -229,23 +210,19 @@ def click_create_custom_food(driver):
     Attempts to click the 'Create a custom food' button once.
     Returns True if successful, False if it fails.
     """
-    create_food_button_xpath = "//div[contains(@class, 'gwt-HTML') and normalize-space(text())='Create a custom food']"
-
     if not wait_for_fixed_glass_invisibility(driver):
         logger.error("Cannot click 'Create a custom food' due to fixedGlass overlay.")
         return False
 
     try:
-        create_food_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, create_food_button_xpath))
-        )
+        create_food_button = wait_for(driver, "create_custom_food", clickable(find_create_custom_food), 10)
         driver.execute_script("arguments[0].scrollIntoView(true);", create_food_button)
         create_food_button.click()
         logger.info("Clicked 'Create a custom food' button on the first attempt.")
         return True
     except (TimeoutException, ElementClickInterceptedException, StaleElementReferenceException) as e:
         logger.warning(f"Failed to click 'Create a custom food' button: {e}")
-        driver.save_screenshot(f"/tmp/create_custom_food_failure_{int(time.time())}.png")
+        capture_failure(driver, "create_custom_food_failure")
         return False
     except Exception as e:
         logger.error(f"Unexpected error clicking 'Create a custom food' button: {e}", exc_info=True)
@@ -0,0 +1,192 @@
+# scripts/network_capture.py
+
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from scripts.instrumentation import add_thread_stage_listener, remove_thread_stage_listener
+from scripts.logging_setup import get_logger
+
+logger = get_logger("network_capture")
+
+CAPTURE_NETWORK = os.getenv('CAPTURE_NETWORK', 'False').lower() == 'true'
+NETWORK_CAPTURE_DIR = os.getenv('NETWORK_CAPTURE_DIR', os.path.join("logs", "network"))
+NETWORK_EVENTS = {
+    "Network.requestWillBeSent", "Network.responseReceived",
+    "Network.loadingFinished", "Network.loadingFailed",
+}
+
+def enable_performance_log(chrome_options):
+    """Ask chromedriver to buffer CDP Network events in the 'performance' log."""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+def _span(timing, start_key, end_key):
+    start, end = timing.get(start_key, -1), timing.get(end_key, -1)
+    return round(end - start, 3) if start >= 0 and end >= 0 else -1
+
+class NetworkCapture:
+    """
+    Collects Chrome network events for one job and attributes every request
+    to the pipeline stage that was running when it was sent.
+
+    Events are drained from the performance log whenever a stage of the
+    current thread finishes, so a request belongs to the step that ended
+    first after it started.
+    """
+
+    def __init__(self):
+        self._driver = None
+        self._requests = {}
+        self._order = []
+        self._stage_seconds = defaultdict(float)
+        self._stage_counts = defaultdict(int)
+        self.path = None
+
+    def install(self, driver):
+        driver.execute_cdp_cmd("Network.enable", {})
+        self._driver = driver
+        driver.network_capture = self
+        return self
+
+    def listen(self, pending_stage=None):
+        """
+        Attribute requests to the stages of the calling thread. Events already
+        buffered, e.g. from before the listener was attached, go to pending_stage.
+        """
+        if pending_stage:
+            self.drain(pending_stage)
+        add_thread_stage_listener(self._on_stage)
+
+    def unlisten(self):
+        remove_thread_stage_listener(self._on_stage)
+
+    def _on_stage(self, name, seconds, tags, error):
+        self._stage_seconds[name] += seconds
+        self._stage_counts[name] += 1
+        self.drain(name, tags)
+
+    def drain(self, stage_name, tags=None):
+        try:
+            entries = self._driver.get_log("performance")
+        except Exception as e:
+            logger.debug(f"Could not read the performance log: {e}")
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            if message.get("method") in NETWORK_EVENTS:
+                self._handle(message["method"], message.get("params", {}), stage_name, tags or {})
+
+    def _handle(self, method, params, stage_name, tags):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if request_id in self._requests:
+                # A redirect reuses the request id; keep the final hop
+                self._requests[request_id]["redirected"] = True
+            else:
+                self._order.append(request_id)
+            self._requests.setdefault(request_id, {}).update({
+                "stage": stage_name,
+                "tags": {key: str(value) for key, value in tags.items()},
+                "url": params["request"]["url"],
+                "method": params["request"]["method"],
+                "type": params.get("type"),
+                "started": params.get("timestamp"),
+                "wall_time": params.get("wallTime"),
+            })
+            return
+        request = self._requests.get(request_id)
+        if request is None:
+            return
+        if method == "Network.responseReceived":
+            response = params.get("response", {})
+            request.update({
+                "status": response.get("status"),
+                "mime_type": response.get("mimeType"),
+                "from_cache": response.get("fromDiskCache", False) or response.get("fromServiceWorker", False),
+                "timing": response.get("timing") or {},
+            })
+        elif method == "Network.loadingFinished":
+            request["finished"] = params.get("timestamp")
+            request["bytes"] = params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed":
+            request["finished"] = params.get("timestamp")
+            request["error"] = params.get("errorText") or params.get("blockedReason")
+
+    def _har_entry(self, request):
+        started = request.get("started") or 0.0
+        total_ms = ((request.get("finished") or started) - started) * 1000
+        timing = request.get("timing", {})
+        headers_ms = timing.get("receiveHeadersEnd", -1)
+        send_end = timing.get("sendEnd", -1)
+        return {
+            "pageref": request["stage"],
+            "startedDateTime": datetime.fromtimestamp(request.get("wall_time") or 0, timezone.utc).isoformat(),
+            "time": round(total_ms, 3),
+            "request": {"method": request["method"], "url": request["url"]},
+            "response": {
+                "status": request.get("status", 0),
+                "content": {"mimeType": request.get("mime_type", ""), "size": request.get("bytes", 0)},
+            },
+            "cache": {"hit": bool(request.get("from_cache"))},
+            "timings": {
+                "blocked": -1,
+                "dns": _span(timing, "dnsStart", "dnsEnd"),
+                "connect": _span(timing, "connectStart", "connectEnd"),
+                "ssl": _span(timing, "sslStart", "sslEnd"),
+                "send": _span(timing, "sendStart", "sendEnd"),
+                "wait": round(headers_ms - send_end, 3) if headers_ms >= 0 and send_end >= 0 else -1,
+                "receive": round(total_ms - headers_ms, 3) if headers_ms >= 0 else -1,
+            },
+            "_resourceType": request.get("type"),
+            "_stageTags": request.get("tags", {}),
+            "_error": request.get("error"),
+        }
+
+    def stage_summary(self, entries):
+        """Per stage: wall time, request count, bytes and time the slowest request was in flight."""
+        summary = {}
+        for name, seconds in self._stage_seconds.items():
+            stage_entries = [entry for entry in entries if entry["pageref"] == name]
+            slowest = max(stage_entries, key=lambda entry: entry["time"], default=None)
+            summary[name] = {
+                "runs": self._stage_counts[name],
+                "seconds": round(seconds, 3),
+                "requests": len(stage_entries),
+                "bytes": sum(entry["response"]["content"]["size"] for entry in stage_entries),
+                "slowest_request_ms": slowest["time"] if slowest else 0,
+                "slowest_request_url": slowest["request"]["url"] if slowest else None,
+            }
+        return summary
+
+    def finish(self, job_id):
+        """Stop listening, collect the remaining events and write <job_id>.json. Safe to call twice."""
+        if self.path or self._driver is None:
+            return self.path
+        self.unlisten()
+        self.drain("after_last_stage")
+        entries = [self._har_entry(self._requests[request_id]) for request_id in self._order]
+        har = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "automated-food-logger", "version": "1"},
+                "pages": [{"id": name, "title": name} for name in dict.fromkeys([*self._stage_seconds, *(entry["pageref"] for entry in entries)])],
+                "entries": entries,
+                "_stages": self.stage_summary(entries),
+            }
+        }
+        try:
+            os.makedirs(NETWORK_CAPTURE_DIR, exist_ok=True)
+            path = os.path.join(NETWORK_CAPTURE_DIR, f"{job_id}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(har, f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to write the network capture of job {job_id}: {e}")
+            return None
+        self.path = path
+        logger.info(f"Wrote {len(entries)} network requests of job {job_id} to {path}.")
+        return path
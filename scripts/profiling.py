@@ -0,0 +1,131 @@
+# scripts/profiling.py
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("profiling")
+
+# Profile every job, not just the ones an admin asked for
+PROFILE_JOBS = os.getenv('PROFILE_JOBS', 'False').lower() == 'true'
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join("logs", "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '10'))
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '25'))
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}.{code.co_name}:{frame.f_lineno}"
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval from a background thread.
+
+    Sampling instead of a deterministic profiler keeps the overhead flat no
+    matter how many Python calls the job makes, and the time a job spends
+    blocked on chromedriver still shows up as samples in the waiting frame.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL_MS / 1000.0):
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.seconds = 0.0
+        self.files = ()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def folded(self):
+        """Stacks in the folded format read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def hotspots(self, top_n=PROFILE_TOP_N):
+        """(self samples, total samples) per function, ordered by self samples."""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = [name.rsplit(":", 1)[0] for name in stack.split(";")]
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        return [(name, own[name], total[name]) for name, _ in own.most_common(top_n)]
+
+    def summary(self, top_n=PROFILE_TOP_N):
+        lines = [
+            f"{self.samples} samples over {self.seconds:.2f} seconds "
+            f"(every {self._interval * 1000:.0f} ms).",
+            "",
+            f"{'self %':>7} {'total %':>8}  function",
+        ]
+        samples = max(1, self.samples)
+        for name, own, total in self.hotspots(top_n):
+            lines.append(f"{own / samples * 100:7.1f} {total / samples * 100:8.1f}  {name}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, job_id, directory=PROFILE_DIR):
+        """Write <job_id>.folded and <job_id>.txt and return their file names."""
+        os.makedirs(directory, exist_ok=True)
+        folded_name = f"{job_id}.folded"
+        summary_name = f"{job_id}.txt"
+        with open(os.path.join(directory, folded_name), 'w', encoding='utf-8') as f:
+            f.write(self.folded())
+        with open(os.path.join(directory, summary_name), 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+        logger.info(f"Wrote profile of job {job_id} ({self.samples} samples) to {directory}.")
+        return folded_name, summary_name
+
+@contextmanager
+def profile_job(job_id):
+    """Profile the calling thread for the duration of the block and write the results under PROFILE_DIR."""
+    profiler = SamplingProfiler(threading.get_ident())
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            profiler.files = profiler.write(job_id)
+        except OSError as e:
+            logger.error(f"Failed to write profile of job {job_id}: {e}")
+
+def format_profile_links(files):
+    """HTML links to the written profile files for the job output."""
+    if not files:
+        return ""
+    folded_name, summary_name = files
+    return (
+        "<br><b style='color: #f9c74f;'>Profile:</b><br>"
+        f"<a href='/profiles/{summary_name}' target='_blank'>Top {PROFILE_TOP_N} hotspots</a> | "
+        f"<a href='/profiles/{folded_name}' target='_blank'>Folded stacks (flamegraph)</a>"
+    )
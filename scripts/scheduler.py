@@ -0,0 +1,221 @@
+# scripts/scheduler.py
+
+import os
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+
+from scripts.admission import AdmissionController
+from scripts.journal import JobJournal
+from scripts.logging_setup import get_logger
+from scripts.profiling import PROFILE_JOBS, profile_job, format_profile_links
+from scripts.tracing import job_transaction, trace_headers
+from scripts.utils import parse_food_items, fingerprint_food_items
+
+logger = get_logger("scheduler")
+
+# Each job drives its own Chrome instance, so this is the browser capacity of the host
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '1'))
+# Switching the diary to another date costs roughly as much as logging a couple of items
+DATE_SWITCH_COST = 2
+WAIT_HISTORY_SIZE = 20
+# Identical submissions completed within this window return the earlier report
+IDEMPOTENCY_WINDOW_SECONDS = int(os.getenv('IDEMPOTENCY_WINDOW_SECONDS', '600'))
+
+def estimate_job_cost(food_items):
+    """
+    Estimate the browser work of a submission from the number of parsed items
+    and the number of distinct diary dates they touch.
+    """
+    distinct_dates = {item.get('Date') for item in food_items}
+    return len(food_items) + DATE_SWITCH_COST * len(distinct_dates)
+
+class Job:
+    def __init__(self, user, log_text, log_water, cost, key, profile=False):
+        self.id = uuid.uuid4().hex
+        self.user = user
+        self.log_text = log_text
+        self.log_water = log_water
+        self.cost = cost
+        self.key = key
+        self.profile = profile
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.failed_items = 0
+        self.trace_headers = trace_headers()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def wait_time(self):
+        end = self.started_at if self.started_at else time.time()
+        return end - self.submitted_at
+
+    def wait(self, timeout=None):
+        """Block until the job has run and return its output, re-raising any failure."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.id} did not finish within {timeout} seconds")
+        if self.error:
+            raise self.error
+        return self.result
+
+class JobScheduler:
+    """
+    Runs logging jobs with a bounded number of concurrent browsers.
+
+    Every user has their own queue ordered by estimated cost so small jobs go
+    first, and the queues are served round-robin so one user's long backfill
+    cannot starve everybody else.
+    """
+
+    def __init__(self, runner, max_concurrent=MAX_CONCURRENT_JOBS, admission=None,
+                 idempotency_window=IDEMPOTENCY_WINDOW_SECONDS):
+        self._runner = runner
+        self._max_concurrent = max(1, max_concurrent)
+        self._admission = admission or AdmissionController(self._max_concurrent)
+        self._idempotency_window = idempotency_window
+        self._jobs_by_key = {}
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._ready_users = deque()
+        self._running = {}
+        self._recent_waits = {}
+        self._seq = itertools.count()
+        self._workers = []
+
+    @property
+    def max_concurrent(self):
+        return self._max_concurrent
+
+    def submit(self, user, log_text, log_water=True, profile=False):
+        """
+        Queue a job, raising CapacityExceeded when no browser or queue slot is available.
+
+        A submission whose parsed items match an in-flight job of the same user
+        returns that job, and one matching a job completed within the
+        idempotency window returns the completed job and its cached report,
+        unless some of its items failed, in which case it runs again.
+        With profile=True the run is sampled and the profile linked in its output.
+        """
+        food_items = parse_food_items(log_text, log_water=log_water)
+        key = (user, fingerprint_food_items(food_items))
+        with self._cond:
+            self._expire_completed()
+            existing = self._jobs_by_key.get(key)
+            # A profiling request has to run again rather than return a cached report
+            if existing and not (profile and existing.done):
+                state = "completed" if existing.done else "in-flight"
+                logger.info(f"Submission from {user} matches {state} job {existing.id}; reusing it.")
+                return existing
+
+            self._admission.check(
+                [running.started_at for running in self._running.values()],
+                sum(len(queue) for queue in self._queues.values()),
+            )
+            job = Job(user, log_text, log_water, estimate_job_cost(food_items), key, profile)
+            self._jobs_by_key[key] = job
+            queue = self._queues.setdefault(user, [])
+            heapq.heappush(queue, (job.cost, next(self._seq), job))
+            if user not in self._ready_users:
+                self._ready_users.append(user)
+            self._start_workers()
+            self._cond.notify()
+        logger.info(f"Queued job {job.id} for {user} with estimated cost {job.cost} ({len(queue)} queued for this user).")
+        return job
+
+    def _expire_completed(self):
+        now = time.time()
+        expired = [
+            key for key, job in self._jobs_by_key.items()
+            if job.done and (job.error or job.failed_items or now - job.finished_at > self._idempotency_window)
+        ]
+        for key in expired:
+            del self._jobs_by_key[key]
+
+    def _start_workers(self):
+        while len(self._workers) < self._max_concurrent:
+            worker = threading.Thread(
+                target=self._work,
+                name=f"log-worker-{len(self._workers) + 1}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        with self._cond:
+            while not self._ready_users:
+                self._cond.wait()
+            user = self._ready_users.popleft()
+            queue = self._queues[user]
+            _, _, job = heapq.heappop(queue)
+            if queue:
+                self._ready_users.append(user)
+            else:
+                del self._queues[user]
+            job.started_at = time.time()
+            self._running[job.id] = job
+            self._recent_waits.setdefault(user, deque(maxlen=WAIT_HISTORY_SIZE)).append(job.wait_time)
+            return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            logger.info(f"Starting job {job.id} for {job.user} after waiting {job.wait_time:.2f} seconds.")
+            try:
+                with job_transaction(job.id, job.trace_headers, user=job.user, cost=job.cost):
+                    if job.profile or PROFILE_JOBS:
+                        with profile_job(job.id) as profiler:
+                            job.result = self._runner(job.log_text, job.log_water, job_id=job.id)
+                        job.result += format_profile_links(profiler.files)
+                    else:
+                        job.result = self._runner(job.log_text, job.log_water, job_id=job.id)
+                # The job's journal knows whether every item went through
+                journal = JobJournal.load(job.id)
+                job.failed_items = (journal.failed_items or 0) if journal else 0
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+                job.error = e
+            finally:
+                job.finished_at = time.time()
+                self._admission.record_duration(job.finished_at - job.started_at)
+                with self._cond:
+                    self._running.pop(job.id, None)
+                job._done.set()
+                logger.info(f"Finished job {job.id} in {job.finished_at - job.started_at:.2f} seconds.")
+
+    def queued_count(self):
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self):
+        """Queue depth and wait times for every user with queued, running or recent work."""
+        now = time.time()
+        with self._cond:
+            users = set(self._queues) | set(self._recent_waits)
+            users |= {job.user for job in self._running.values()}
+            stats = {}
+            for user in sorted(users):
+                queued = [job for _, _, job in self._queues.get(user, [])]
+                waits = self._recent_waits.get(user, ())
+                stats[user] = {
+                    "queued": len(queued),
+                    "running": sum(1 for job in self._running.values() if job.user == user),
+                    "oldest_wait_seconds": round(max((now - job.submitted_at for job in queued), default=0.0), 2),
+                    "average_wait_seconds": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                }
+            return {
+                "max_concurrent": self._max_concurrent,
+                "running": len(self._running),
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "users": stats,
+            }
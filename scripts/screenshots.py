@@ -0,0 +1,155 @@
+# scripts/screenshots.py
+
+import base64
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("screenshots")
+
+SCREENSHOT_DIR = os.getenv('SCREENSHOT_DIR', os.path.join("logs", "screenshots"))
+# JPEG from Chrome is a fraction of the size of the PNG save_screenshot() produced
+SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'jpeg')
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '60'))
+# Ring buffer limits per job; the oldest capture is deleted first
+SCREENSHOT_MAX_PER_JOB = int(os.getenv('SCREENSHOT_MAX_PER_JOB', '10'))
+SCREENSHOT_MAX_BYTES_PER_JOB = int(os.getenv('SCREENSHOT_MAX_BYTES_PER_JOB', str(5 * 1024 * 1024)))
+# Only the screenshots of the most recent jobs are kept on disk
+SCREENSHOT_MAX_JOBS = int(os.getenv('SCREENSHOT_MAX_JOBS', '20'))
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+class ScreenshotRecorder:
+    """
+    Failure screenshots of one job, kept as a ring buffer bounded by count
+    and total bytes under SCREENSHOT_DIR/<job id>/.
+    """
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.directory = os.path.join(SCREENSHOT_DIR, self.job_id)
+        self.captures = deque()
+        self.total_bytes = 0
+        self.dropped = 0
+        self._seq = 0
+        self._pending = 0
+        self._cond = threading.Condition()
+
+    def install(self, driver):
+        driver.screenshots = self
+        return self
+
+    def _submit(self, label, data):
+        with self._cond:
+            self._seq += 1
+            self._pending += 1
+            seq = self._seq
+        _ensure_writer()
+        _queue.put((self, seq, label, data))
+
+    def _store(self, seq, label, data):
+        try:
+            image = base64.b64decode(data)
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, exist_ok=True)
+                _prune_old_jobs()
+            file_name = f"{seq:03d}_{label}.{'jpg' if SCREENSHOT_FORMAT == 'jpeg' else SCREENSHOT_FORMAT}"
+            with open(os.path.join(self.directory, file_name), 'wb') as f:
+                f.write(image)
+            with self._cond:
+                self.captures.append((file_name, len(image)))
+                self.total_bytes += len(image)
+                while len(self.captures) > 1 and (
+                    len(self.captures) > SCREENSHOT_MAX_PER_JOB or self.total_bytes > SCREENSHOT_MAX_BYTES_PER_JOB
+                ):
+                    old_name, old_size = self.captures.popleft()
+                    self.total_bytes -= old_size
+                    self.dropped += 1
+                    try:
+                        os.remove(os.path.join(self.directory, old_name))
+                    except OSError:
+                        pass
+        except Exception as e:
+            logger.error(f"Failed to store screenshot '{label}' of job {self.job_id}: {e}")
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def flush(self, timeout=5):
+        """Wait until the captures of this job are on disk."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def format_report(self):
+        """HTML links to the kept captures for the job output."""
+        self.flush()
+        with self._cond:
+            captures = list(self.captures)
+        if not captures:
+            return ""
+        links = [
+            f"<a href='/screenshots/{self.job_id}/{file_name}' target='_blank'>{file_name}</a>"
+            for file_name, _ in captures
+        ]
+        if self.dropped:
+            links.append(f"({self.dropped} older screenshots dropped)")
+        return "<b style='color: #f9c74f;'>Failure Screenshots:</b><br>" + "<br>".join(links)
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_loop, name="screenshot-writer", daemon=True)
+            _writer.start()
+
+def _write_loop():
+    while True:
+        recorder, seq, label, data = _queue.get()
+        recorder._store(seq, label, data)
+
+def _prune_old_jobs():
+    try:
+        job_dirs = [
+            os.path.join(SCREENSHOT_DIR, name) for name in os.listdir(SCREENSHOT_DIR)
+            if os.path.isdir(os.path.join(SCREENSHOT_DIR, name))
+        ]
+    except OSError:
+        return
+    job_dirs.sort(key=os.path.getmtime)
+    for path in job_dirs[:-SCREENSHOT_MAX_JOBS]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def capture_failure(driver, label):
+    """
+    Grab the current page with one CDP call and queue it for the background
+    writer. Never raises, so it is safe inside retry paths.
+    """
+    recorder = getattr(driver, "screenshots", None)
+    if recorder is None:
+        recorder = ScreenshotRecorder().install(driver)
+    try:
+        params = {"format": SCREENSHOT_FORMAT}
+        if SCREENSHOT_FORMAT != "png":
+            params["quality"] = SCREENSHOT_QUALITY
+        result = driver.execute_cdp_cmd("Page.captureScreenshot", params)
+    except Exception as e:
+        logger.warning(f"Could not capture screenshot '{label}': {e}")
+        return
+    recorder._submit(re.sub(r"[^A-Za-z0-9_-]", "_", label), result["data"])
+    logger.info(f"Queued screenshot '{label}' for job {recorder.job_id}.")
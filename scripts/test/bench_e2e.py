@@ -0,0 +1,170 @@
+# scripts/test/bench_e2e.py
+
+"""
+End-to-end latency benchmark for scripts.main.main() against the offline mock.
+
+Every workload logs synthetic items in headless Chrome and records how long
+each step of attempt_food_logging() took. The p50/p95 per step are written to
+a JSON file, and with --baseline the run fails when any step's p50 regressed
+by more than --max-regression percent.
+
+    python -m scripts.test.bench_e2e --sizes 1,10 --latency-ms 100
+    python -m scripts.test.bench_e2e --baseline bench_results/e2e.json --max-regression 20
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from scripts.test.mock_loseit import start_mock_server
+
+STEPS = [
+    "navigate", "initial_position", "search_box", "placeholder",
+    "create_custom_food", "enter_details", "save", "water",
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+def build_log(num_items, multi_day, water):
+    """Synthetic food log in the GPT output format parse_food_items() expects."""
+    meals = ["Breakfast", "Lunch", "Dinner", "Snacks"]
+    blocks = []
+    for i in range(num_items):
+        day = date.today() - timedelta(days=(i % 3) if multi_day else 0)
+        serving = "12 fluid ounce" if water else "1 1/2 cup"
+        blocks.append("\n".join([
+            f"Food Name: Bench Item {i + 1}",
+            f"Date: {day.month}/{day.day}",
+            f"Meal: {meals[i % len(meals)]}",
+            "Brand: Benchmark",
+            "Icon: Coffee",
+            f"Serving Size: {serving}",
+            "Calories: 120",
+            "Fat (g): 4",
+            "Saturated Fat (g): 1",
+            "Cholesterol (mg): 10",
+            "Sodium (mg): 85",
+            "Carbs (g): 15",
+            "Fiber (g): 2",
+            "Sugar (g): 6",
+            "Protein (g): 7",
+        ]))
+    return "\n\n".join(blocks)
+
+def workloads(sizes):
+    for size in sizes:
+        for multi_day in (False, True):
+            for water in (False, True):
+                name = f"{size}_items_{'multi' if multi_day else 'same'}_day_{'water' if water else 'no_water'}"
+                yield name, size, multi_day, water
+
+def run_workload(main, num_items, multi_day, water):
+    from scripts.instrumentation import thread_stage_listener
+
+    durations = defaultdict(list)
+    def listener(name, seconds, tags, error):
+        if name in STEPS:
+            durations[name].append(seconds)
+
+    log_text = build_log(num_items, multi_day, water)
+    start = time.perf_counter()
+    with thread_stage_listener(listener):
+        main(log_text, water)
+    total = time.perf_counter() - start
+
+    return {
+        "items": num_items,
+        "total_seconds": round(total, 3),
+        "seconds_per_item": round(total / num_items, 3),
+        "steps": {
+            step: {
+                "count": len(durations[step]),
+                "p50": round(percentile(durations[step], 50), 4),
+                "p95": round(percentile(durations[step], 95), 4),
+            }
+            for step in STEPS if durations[step]
+        },
+    }
+
+def find_regressions(results, baseline, max_regression):
+    regressions = []
+    for name, workload in results["workloads"].items():
+        base_workload = baseline.get("workloads", {}).get(name)
+        if not base_workload:
+            continue
+        for step, timing in workload["steps"].items():
+            base = base_workload["steps"].get(step)
+            if not base or base["p50"] <= 0:
+                continue
+            change = (timing["p50"] - base["p50"]) / base["p50"] * 100
+            if change > max_regression:
+                regressions.append(f"{name} / {step}: p50 {base['p50']:.3f}s -> {timing['p50']:.3f}s (+{change:.0f}%)")
+    return regressions
+
+def print_report(results):
+    for name, workload in results["workloads"].items():
+        print(f"\n{name}: {workload['total_seconds']:.2f}s total, {workload['seconds_per_item']:.2f}s per item")
+        for step in STEPS:
+            timing = workload["steps"].get(step)
+            if timing:
+                print(f"  {step:<20} p50 {timing['p50']:.3f}s  p95 {timing['p95']:.3f}s  (n={timing['count']})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark against the mock Lose It! app.")
+    parser.add_argument("--sizes", default="1,10,100", help="Comma separated item counts")
+    parser.add_argument("--latency-ms", type=int, default=100, help="Latency of the mock site")
+    parser.add_argument("--glass-ms", type=int, default=0, help="fixedGlass overlay duration after each search")
+    parser.add_argument("--output", default=os.path.join("bench_results", "e2e.json"))
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed p50 slowdown per step, in percent")
+    args = parser.parse_args()
+
+    server = start_mock_server(latency_ms=args.latency_ms, glass_ms=args.glass_ms)
+    scratch = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.environ.update(server.environment)
+    os.environ.update({
+        "HEADLESS_MODE": "True",
+        # Every run logs the same synthetic items, so the history store must not skip them
+        "SKIP_ALREADY_LOGGED": "False",
+        "HISTORY_DB_PATH": os.path.join(scratch, "history.db"),
+        "JOURNAL_DIR": os.path.join(scratch, "journal"),
+    })
+    from scripts.main import main
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = {"latency_ms": args.latency_ms, "glass_ms": args.glass_ms, "workloads": {}}
+    try:
+        for name, size, multi_day, water in workloads(sizes):
+            print(f"Running {name}...")
+            results["workloads"][name] = run_workload(main, size, multi_day, water)
+    finally:
+        server.stop()
+
+    print_report(results)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\nSteps slower than the baseline by more than {args.max_regression:.0f}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No step regressed beyond the threshold.")
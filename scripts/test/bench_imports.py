@@ -0,0 +1,88 @@
+# scripts/test/bench_imports.py
+
+"""
+Import-time budget for the web app.
+
+Imports a module (app by default) in a fresh interpreter under
+`python -X importtime`, reports the slowest modules by cumulative import
+time, and fails when the total exceeds --budget-ms or when any module in
+--forbid was imported. Selenium, webdriver_manager and the automation stack
+should only load when the first logging job runs.
+
+    python -m scripts.test.bench_imports
+    python -m scripts.test.bench_imports --module app --budget-ms 1500 --top 25
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_FORBIDDEN = "selenium,webdriver_manager,scripts.main,scripts.login,scripts.navigation,scripts.food_entry,scripts.water_intake"
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def measure(module):
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed.")
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return parse_importtime(result.stderr), loaded
+
+def forbidden_loaded(loaded, forbidden):
+    return sorted(
+        name for name in loaded
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in forbidden)
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import cost of the web app.")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Allowed cumulative import time of --module")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--forbid", default=DEFAULT_FORBIDDEN, help="Comma separated modules that must not be imported")
+    args = parser.parse_args()
+
+    rows, loaded = measure(args.module)
+    total_us = next((cumulative for name, _, cumulative, depth in rows if name == args.module and depth == 0), None)
+    if total_us is None:
+        total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+    own = [row for row in rows if row[0] == "scripts" or row[0].startswith("scripts.")]
+    if own:
+        print("\nProject modules:")
+        for name, self_us, cumulative_us, _ in sorted(own, key=lambda row: -row[2]):
+            print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    print(f"\nImporting {args.module} took {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms).")
+    failed = False
+    if total_us / 1000 > args.budget_ms:
+        print("Import time is over budget.")
+        failed = True
+    heavy = forbidden_loaded(loaded, [name.strip() for name in args.forbid.split(",") if name.strip()])
+    if heavy:
+        print(f"Modules that should load lazily were imported: {', '.join(heavy[:10])}")
+        failed = True
+    sys.exit(1 if failed else 0)
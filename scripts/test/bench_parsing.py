@@ -0,0 +1,123 @@
+# scripts/test/bench_parsing.py
+
+"""
+Micro-benchmarks for the pure-Python parsing and reporting paths.
+
+Generates synthetic food logs from 10 to 100k items and records the wall
+time and peak traced memory of utils.parse_food_items(),
+food_entry.parse_serving_amount(), food_entry.round_fraction_to_nearest_common()
+and utils.compare_items(). No browser is started.
+
+    python -m scripts.test.bench_parsing
+    python -m scripts.test.bench_parsing --sizes 10,1000 --output bench_results/parsing.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+import tracemalloc
+
+from scripts.food_entry import parse_serving_amount, round_fraction_to_nearest_common
+from scripts.utils import parse_food_items, compare_items
+
+SERVING_SIZES = ["1 cup", "1 1/2 cup", "0.75 serving", "2/3 cup", "12 fluid ounce", "3 (about 90g) pieces"]
+
+def build_log(num_items):
+    blocks = []
+    for i in range(num_items):
+        blocks.append("\n".join([
+            f"Food Name: Synthetic Item {i}",
+            f"Date: {i % 12 + 1}/{i % 28 + 1}",
+            f"Meal: {['Breakfast', 'Lunch', 'Dinner', 'Snacks'][i % 4]}",
+            "Brand: Benchmark",
+            "Icon: Coffee",
+            f"Serving Size: {SERVING_SIZES[i % len(SERVING_SIZES)]}",
+            f"Calories: {100 + i % 400}",
+            "Fat (g): 4",
+            "Saturated Fat (g): 1",
+            "Cholesterol (mg): 10",
+            "Sodium (mg): 85",
+            "Carbs (g): 15",
+            "Fiber (g): 2",
+            "Sugar (g): 6",
+            "Protein (g): 7",
+        ]))
+    return "\n\n".join(blocks)
+
+def measure(func, *args):
+    """
+    Return (seconds, peak traced bytes) for one call of func. Timing and
+    memory come from separate runs because tracemalloc slows allocation down.
+    """
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+def serving_amounts(food_items):
+    for item in food_items:
+        amount = item["Serving Size"].split(" ", 1)[0]
+        parse_serving_amount(amount)
+
+def fractions(food_items):
+    for item in food_items:
+        _, fraction = parse_serving_amount(item["Serving Size"].split(" ", 1)[0])
+        if fraction:
+            round_fraction_to_nearest_common(fraction)
+
+def logged_copies(food_items):
+    logged = []
+    for item in food_items:
+        copy = dict(item)
+        copy["fluid_ounces_added"] = item.get("fluid_ounces", 0.0)
+        logged.append(copy)
+    # Report order differs from input order in real runs
+    logged.reverse()
+    return logged
+
+def run(sizes):
+    results = {}
+    for size in sizes:
+        log_text = build_log(size)
+        food_items = parse_food_items(log_text)
+        logged_items = logged_copies(food_items)
+        cases = {
+            "parse_food_items": (parse_food_items, log_text),
+            "parse_serving_amount": (serving_amounts, food_items),
+            "round_fraction_to_nearest_common": (fractions, food_items),
+            "compare_items": (compare_items, food_items, logged_items),
+        }
+        results[size] = {}
+        for name, (func, *args) in cases.items():
+            seconds, peak = measure(func, *args)
+            results[size][name] = {
+                "seconds": round(seconds, 6),
+                "microseconds_per_item": round(seconds / size * 1e6, 2),
+                "peak_kib": round(peak / 1024, 1),
+            }
+            print(f"{size:>7} items  {name:<34} {seconds:9.4f}s  {seconds / size * 1e6:9.2f}us/item  peak {peak / 1024:10.1f} KiB")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for parsing and reporting.")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="Comma separated item counts")
+    parser.add_argument("--output", default=os.path.join("bench_results", "parsing.json"))
+    parser.add_argument("--with-logging", action="store_true", help="Keep application logging enabled while measuring")
+    args = parser.parse_args()
+
+    if not args.with_logging:
+        # The per-item log lines would otherwise dominate the measurement
+        logging.disable(logging.WARNING)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = run(sizes)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
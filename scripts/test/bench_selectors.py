@@ -0,0 +1,189 @@
+# scripts/test/bench_selectors.py
+
+"""
+Cost of the element lookups on a captured copy of the diary page.
+
+Compares the document-wide XPath text scans the scripts used to run with the
+scoped CSS/ID lookups in scripts/locators.py. The copy is a static snapshot:
+either a diary page saved from the browser (--page) or the mock diary with its
+search popup open, captured with its scripts stripped. --filler adds gwt-HTML
+nodes to bring the DOM closer to the size of the real GWT app. Every lookup is
+timed inside the page, so WebDriver round trips do not blur the difference.
+
+    python -m scripts.test.bench_selectors
+    python -m scripts.test.bench_selectors --page diary.html --filler 0 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+from scripts import locators
+from scripts.login import initialize_driver, quit_driver
+from scripts.test.mock_loseit import AUTH_COOKIE, start_mock_server
+
+# Runs one lookup `repeat` times in the page and returns [mean ms, matches]
+TIMING_SCRIPT = """
+const [kind, query, args, repeat] = arguments;
+let run;
+if (kind === 'xpath') {
+    run = () => document.evaluate(query, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+} else if (kind === 'css') {
+    run = () => document.querySelectorAll(query).length;
+} else {
+    const script = new Function(query);
+    run = () => { const found = script.apply(null, args); return found == null ? 0 : (Array.isArray(found) ? found.length : 1); };
+}
+let matches = run();
+const start = performance.now();
+for (let i = 0; i < repeat; i++) { matches = run(); }
+return [(performance.now() - start) / repeat, matches];
+"""
+
+FILLER_SCRIPT = """
+const count = arguments[0];
+const root = document.createElement('div');
+root.className = 'bench-filler';
+let parent = root;
+for (let i = 0; i < count; i++) {
+    const node = document.createElement('div');
+    node.className = 'gwt-HTML';
+    node.textContent = 'Filler row ' + i;
+    // Nest a little, like GWT panels do
+    if (i % 50 === 0) { parent = root.appendChild(document.createElement('div')); }
+    parent.appendChild(node);
+}
+document.body.appendChild(root);
+return document.getElementsByTagName('*').length;
+"""
+
+CAPTURE_SCRIPT = """
+document.querySelectorAll('script').forEach(script => script.remove());
+return '<!DOCTYPE html>' + document.documentElement.outerHTML;
+"""
+
+def cases(year):
+    """(name, legacy lookups, scoped lookups) as lists of (kind, query, args)."""
+    return [
+        ("date_header_by_text", [
+            ("xpath", f"//div[contains(@class, 'gwt-HTML') and contains(text(), ', {year}')]", []),
+            ("xpath", f"//div[contains(text(), ', {year}')]", []),
+        ], [
+            # An unknown class forces the text fallback of find_date_header()
+            ("script", locators.DATE_HEADER_SCRIPT, ["div.bench-unknown-class"]),
+        ]),
+        ("date_header_by_class", [
+            ("xpath", "//div[contains(@class, 'GNOSQVDBIYB')]", []),
+        ], [
+            ("css", locators.DATE_HEADER[1], []),
+        ]),
+        ("next_day_button", [
+            ("xpath", "//div[@role='button' and @title='Next']", []),
+            ("xpath", "//div[contains(@class, 'nextArrowButton')]", []),
+            ("xpath", "//div[contains(@class, 'nextArrowButton') and @role='button']", []),
+            ("xpath", "//div[@title='Next' and @role='button']", []),
+        ], [
+            ("css", locators.NEXT_DAY_BUTTON[1], []),
+        ]),
+        ("meal_search_box", [
+            ("xpath", "//input[@tabindex='300']", []),
+        ], [
+            ("css", locators.meal_input("Lunch")[1], []),
+        ]),
+        ("create_custom_food", [
+            ("xpath", "//div[contains(@class, 'gwt-HTML') and normalize-space(text())='Create a custom food']", []),
+        ], [
+            ("script", locators.TEXT_MATCH_SCRIPT, [locators.CREATE_CUSTOM_FOOD_SELECTOR, locators.CREATE_CUSTOM_FOOD_TEXT]),
+        ]),
+        ("close_overlays", [
+            ("xpath", "//div[@role='button' and @title='Close']", []),
+            ("xpath", "//button[contains(text(), 'Close')]", []),
+            ("xpath", "//div[contains(@class, 'overlay')]//button[contains(text(), 'Close')]", []),
+        ], [
+            ("script", locators.OVERLAY_CLOSE_SCRIPT, []),
+        ]),
+        ("login_error_scan", [
+            ("xpath", "//*[contains(text(), 'error') or contains(text(), 'Error') or contains(text(), 'invalid') or contains(text(), 'Invalid')]", []),
+        ], [
+            ("css", "form [role='alert'], form [class*='error' i]", []),
+        ]),
+    ]
+
+def capture_mock_diary(driver):
+    """Open the mock diary with the search popup showing and return a static copy of it."""
+    server = start_mock_server()
+    try:
+        driver.get(f"{server.base_url}login")
+        driver.add_cookie({"name": AUTH_COOKIE, "value": "bench"})
+        driver.get(server.base_url)
+        search_box = driver.find_element(*locators.meal_input("Lunch"))
+        search_box.send_keys("bench\n")
+        deadline = time.monotonic() + 5
+        while locators.find_create_custom_food(driver) is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return driver.execute_script(CAPTURE_SCRIPT)
+    finally:
+        server.stop()
+
+def time_lookups(driver, lookups, repeat, rounds):
+    """Median over rounds of the summed per-lookup cost; returns (ms, matches)."""
+    totals = []
+    matches = 0
+    for _ in range(rounds):
+        total = 0.0
+        matches = 0
+        for kind, query, args in lookups:
+            ms, found = driver.execute_script(TIMING_SCRIPT, kind, query, args, repeat)
+            total += ms
+            matches += found
+        totals.append(total)
+    return statistics.median(totals), matches
+
+def run(driver, page_path, filler, repeat, rounds):
+    driver.get(f"file://{os.path.abspath(page_path)}")
+    nodes = driver.execute_script(FILLER_SCRIPT, filler)
+    print(f"Page: {page_path} ({nodes} elements)\n")
+    print(f"{'lookup':<22} {'xpath ms':>10} {'scoped ms':>10} {'speedup':>8}  matches (xpath/scoped)")
+    results = {"page": page_path, "elements": nodes, "repeat": repeat, "rounds": rounds, "lookups": {}}
+    for name, legacy, scoped in cases(date.today().year):
+        legacy_ms, legacy_matches = time_lookups(driver, legacy, repeat, rounds)
+        scoped_ms, scoped_matches = time_lookups(driver, scoped, repeat, rounds)
+        speedup = legacy_ms / scoped_ms if scoped_ms else float("inf")
+        print(f"{name:<22} {legacy_ms:10.4f} {scoped_ms:10.4f} {speedup:7.1f}x  {legacy_matches}/{scoped_matches}")
+        results["lookups"][name] = {
+            "xpath_ms": round(legacy_ms, 5),
+            "scoped_ms": round(scoped_ms, 5),
+            "speedup": round(speedup, 2),
+            "xpath_matches": legacy_matches,
+            "scoped_matches": scoped_matches,
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare XPath text scans with the scoped selectors in scripts/locators.py.")
+    parser.add_argument("--page", help="Saved copy of the diary page; defaults to a capture of the mock diary")
+    parser.add_argument("--filler", type=int, default=5000, help="Extra gwt-HTML nodes added to the page")
+    parser.add_argument("--repeat", type=int, default=100, help="Lookups per timing sample")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default=os.path.join("bench_results", "selectors.json"))
+    args = parser.parse_args()
+
+    driver = initialize_driver(headless=True)
+    try:
+        page_path = args.page
+        if not page_path:
+            with tempfile.NamedTemporaryFile("w", suffix=".html", prefix="diary_", delete=False, encoding="utf-8") as f:
+                f.write(capture_mock_diary(driver))
+                page_path = f.name
+        results = run(driver, page_path, args.filler, args.repeat, args.rounds)
+    finally:
+        quit_driver(driver)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
@@ -0,0 +1,389 @@
+# scripts/test/mock_loseit.py
+
+"""
+Offline stand-in for the parts of the Lose It! web app the automation uses.
+
+It reproduces the DOM contract the scripts depend on: the login form
+(#email/#password), the diary date header and Previous/Next arrows, the meal
+search inputs at tabindex 200/300/400/500, the "Create a custom food" dialog
+(tabindex 1004 onwards and the addFoodToLog button), an injectable fixedGlass
+overlay and the water goals page (GCJ-IGUC0B, GCJ-IGUKWC, recordButton).
+Every request can be slowed down by a configurable latency.
+
+Run it on its own:
+
+    python -m scripts.test.mock_loseit --port 8765 --latency-ms 150
+
+or run a food log through scripts.main.main() against it in headless Chrome:
+
+    python -m scripts.test.mock_loseit --run-log txt/nutritional_data_example.txt
+
+Set CHROMEDRIVER_PATH and GOOGLE_CHROME_SHIM to run fully offline, otherwise
+webdriver-manager downloads a driver on first use.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+
+from flask import Flask, jsonify, redirect, render_template_string, request
+from werkzeug.serving import make_server
+
+AUTH_COOKIE = "liauth"
+
+config = {
+    "latency_ms": 0,
+    "glass_ms": 0,
+    "email": None,
+    "password": None,
+}
+state = {
+    "foods": [],
+    "water": {},
+}
+state_lock = threading.Lock()
+
+app = Flask(__name__)
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html>
+  <head><title>Log In | Lose It!</title></head>
+  <body>
+    <form method="post" action="/login?r={{ target|urlencode }}">
+      {% if error %}<div class="login-error">Invalid email or password</div>{% endif %}
+      <input id="email" name="email" type="email">
+      <input id="password" name="password" type="password">
+      <button type="submit">Log In</button>
+    </form>
+  </body>
+</html>
+"""
+
+APP_PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <title>Lose It!</title>
+    <style>
+      .fixedGlass { position: fixed; top: 0; left: 0; right: 0; bottom: 0; background: rgba(0, 0, 0, 0.1); z-index: 50; }
+      #search-popup, #custom-food-dialog { border: 1px solid #999; padding: 8px; margin: 8px 0; background: #fff; }
+      [role=button], .recordButton, .addFoodToLog { display: inline-block; padding: 4px 8px; border: 1px solid #666; cursor: pointer; }
+    </style>
+  </head>
+  <body>
+    <div id="app"></div>
+    <script>
+      var LATENCY_MS = {{ latency_ms }};
+      var GLASS_MS = {{ glass_ms }};
+      var WATER = {{ water|tojson }};
+      var FOODS = {{ foods|tojson }};
+      var DAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"];
+      var MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+      var FRACTIONS = ["", "1/8", "1/4", "1/3", "1/2", "2/3", "3/4", "7/8"];
+      var MEALS = [["Breakfast", 200], ["Lunch", 300], ["Dinner", 400], ["Snacks", 500]];
+      var NUTRIENTS = ["Calories", "Fat (g)", "Saturated Fat (g)", "Cholesterol (mg)", "Sodium (mg)",
+                       "Carbs (g)", "Fiber (g)", "Sugar (g)", "Protein (g)"];
+
+      var today = new Date();
+      today.setHours(0, 0, 0, 0);
+      var diaryDate = new Date(today);
+      var waterDate = new Date(today);
+      var activeMeal = null;
+
+      function formatDate(d) {
+        return DAYS[d.getDay()] + " " + MONTHS[d.getMonth()] + " " + d.getDate() + ", " + d.getFullYear();
+      }
+      function isoDate(d) {
+        var m = ("0" + (d.getMonth() + 1)).slice(-2);
+        var day = ("0" + d.getDate()).slice(-2);
+        return d.getFullYear() + "-" + m + "-" + day;
+      }
+      function later(fn) {
+        setTimeout(fn, LATENCY_MS);
+      }
+      function post(url, payload, fn) {
+        var xhr = new XMLHttpRequest();
+        xhr.open("POST", url);
+        xhr.setRequestHeader("Content-Type", "application/json");
+        xhr.onload = function () { fn(JSON.parse(xhr.responseText)); };
+        xhr.send(JSON.stringify(payload));
+      }
+      function el(html) {
+        var wrapper = document.createElement("div");
+        wrapper.innerHTML = html.trim();
+        return wrapper.firstChild;
+      }
+
+      function renderDiary() {
+        var app = document.getElementById("app");
+        var html = '<div class="diary">' +
+          '<div role="button" title="Previous" class="prevArrowButton">&lt;</div> ' +
+          '<div class="gwt-HTML GNOSQVDBIYB GMQI3OOBIYB" id="date-header" style="display:inline-block">' +
+          formatDate(diaryDate) + '</div> ' +
+          '<div role="button" title="Next" class="nextArrowButton">&gt;</div>';
+        MEALS.forEach(function (meal) {
+          html += '<div class="meal"><h3>' + meal[0] + '</h3><ul>';
+          FOODS.filter(function (f) { return f.date === isoDate(diaryDate) && f.meal === meal[0]; })
+            .forEach(function (f) { html += '<li>' + f.name + '</li>'; });
+          html += '</ul><input type="text" tabindex="' + meal[1] + '" data-meal="' + meal[0] + '"></div>';
+        });
+        html += '</div>';
+        app.innerHTML = html;
+
+        app.querySelector(".prevArrowButton").onclick = function () { shiftDiary(-1); };
+        app.querySelector(".nextArrowButton").onclick = function () { shiftDiary(1); };
+        app.querySelectorAll("input[data-meal]").forEach(function (input) {
+          input.onkeydown = function (e) {
+            if (e.key === "Enter") {
+              activeMeal = input.getAttribute("data-meal");
+              later(showSearchResults);
+            }
+          };
+        });
+      }
+
+      function shiftDiary(days) {
+        later(function () {
+          diaryDate.setDate(diaryDate.getDate() + days);
+          renderDiary();
+        });
+      }
+
+      function showSearchResults() {
+        closeDialogs();
+        var popup = el('<div id="search-popup"><div class="gwt-HTML">No matching foods</div>' +
+                       '<div class="gwt-HTML">Create a custom food</div></div>');
+        document.getElementById("app").appendChild(popup);
+        popup.lastChild.onclick = showCustomFoodDialog;
+        if (GLASS_MS > 0) {
+          var glass = el('<div class="fixedGlass"></div>');
+          document.body.appendChild(glass);
+          setTimeout(function () { glass.remove(); }, GLASS_MS);
+        }
+      }
+
+      function showCustomFoodDialog() {
+        closeDialogs();
+        var fields = ["Brand", "Food Name", "Icon"];
+        var html = '<div id="custom-food-dialog">';
+        var tabindex = 1004;
+        fields.forEach(function (name) {
+          html += '<label>' + name + ' <input type="text" tabindex="' + (tabindex++) + '" data-field="' + name + '"></label><br>';
+        });
+        html += '<label>Serving <input type="text" tabindex="' + (tabindex++) + '" data-field="Serving Whole" size="3"></label>';
+        html += '<input type="text" readonly tabindex="' + (tabindex++) + '" data-field="Serving Fraction" size="3">';
+        html += '<input type="text" tabindex="' + (tabindex++) + '" data-field="Serving Type"><br>';
+        NUTRIENTS.forEach(function (name) {
+          html += '<label>' + name + ' <input type="text" tabindex="' + (tabindex++) + '" data-field="' + name + '"></label><br>';
+        });
+        html += '<div tabindex="1020" class="addFoodToLog">Add Food</div></div>';
+        var dialog = el(html);
+        document.getElementById("app").appendChild(dialog);
+
+        var fraction = dialog.querySelector('[data-field="Serving Fraction"]');
+        fraction.onkeydown = function (e) {
+          if (e.key === "ArrowUp" || e.key === "ArrowDown") {
+            var index = FRACTIONS.indexOf(fraction.value);
+            index = (index + (e.key === "ArrowUp" ? 1 : FRACTIONS.length - 1)) % FRACTIONS.length;
+            fraction.value = FRACTIONS[index];
+            e.preventDefault();
+          }
+        };
+        dialog.querySelector(".addFoodToLog").onclick = saveCustomFood;
+        dialog.querySelector('[tabindex="1004"]').focus();
+      }
+
+      function saveCustomFood() {
+        var dialog = document.getElementById("custom-food-dialog");
+        var food = {date: isoDate(diaryDate), meal: activeMeal};
+        dialog.querySelectorAll("[data-field]").forEach(function (input) {
+          food[input.getAttribute("data-field")] = input.value;
+        });
+        food.name = food["Food Name"];
+        post("/api/foods", food, function (saved) {
+          FOODS.push(saved);
+          renderDiary();
+        });
+      }
+
+      function closeDialogs() {
+        ["search-popup", "custom-food-dialog"].forEach(function (id) {
+          var node = document.getElementById(id);
+          if (node) { node.remove(); }
+        });
+      }
+
+      function renderWater() {
+        var app = document.getElementById("app");
+        var value = WATER[isoDate(waterDate)] || 0;
+        app.innerHTML = '<div class="water-goals">' +
+          '<div title="Previous" class="waterPrev">&lt;</div> ' +
+          '<div class="GCJ-IGUC0B" style="display:inline-block">' + formatDate(waterDate) + '</div><br>' +
+          '<input type="text" class="gwt-TextBox GCJ-IGUKWC" value="' + value + '"> oz ' +
+          '<div class="recordButton">Record</div></div>';
+        app.querySelector(".waterPrev").onclick = function () {
+          later(function () {
+            waterDate.setDate(waterDate.getDate() - 1);
+            renderWater();
+          });
+        };
+        app.querySelector(".recordButton").onclick = function () {
+          var ounces = parseFloat(app.querySelector(".GCJ-IGUKWC").value);
+          post("/api/water", {date: isoDate(waterDate), ounces: ounces}, function (saved) {
+            WATER[saved.date] = saved.ounces;
+          });
+        };
+      }
+
+      function route() {
+        if (decodeURIComponent(location.hash).indexOf("#Goals:Water Intake") === 0) {
+          waterDate = new Date(today);
+          renderWater();
+        } else {
+          renderDiary();
+        }
+      }
+
+      window.addEventListener("hashchange", route);
+      route();
+    </script>
+  </body>
+</html>
+"""
+
+@app.before_request
+def simulate_latency():
+    if config["latency_ms"] and not request.path.startswith("/api/config"):
+        time.sleep(config["latency_ms"] / 1000.0)
+
+@app.route("/login", methods=["GET", "POST"])
+def login():
+    target = request.args.get("r", "/")
+    if request.method == "GET":
+        return render_template_string(LOGIN_PAGE, target=target, error=False)
+    email = request.form.get("email", "")
+    password = request.form.get("password", "")
+    valid = (config["email"] is None or email == config["email"]) and \
+            (config["password"] is None or password == config["password"])
+    if not email or not password or not valid:
+        return render_template_string(LOGIN_PAGE, target=target, error=True), 401
+    response = redirect(target)
+    response.set_cookie(AUTH_COOKIE, "mock-session")
+    return response
+
+@app.route("/")
+def diary():
+    if not request.cookies.get(AUTH_COOKIE):
+        return redirect(f"/login?r={quote(request.url, safe='')}")
+    with state_lock:
+        return render_template_string(
+            APP_PAGE,
+            latency_ms=config["latency_ms"],
+            glass_ms=config["glass_ms"],
+            water=state["water"],
+            foods=state["foods"],
+        )
+
+@app.route("/api/foods", methods=["POST"])
+def add_food():
+    food = request.get_json()
+    with state_lock:
+        state["foods"].append(food)
+    return jsonify(food)
+
+@app.route("/api/water", methods=["POST"])
+def record_water():
+    payload = request.get_json()
+    with state_lock:
+        state["water"][payload["date"]] = payload["ounces"]
+    return jsonify(payload)
+
+@app.route("/api/state", methods=["GET"])
+def get_state():
+    with state_lock:
+        return jsonify(state)
+
+@app.route("/api/reset", methods=["POST"])
+def reset_state():
+    with state_lock:
+        state["foods"].clear()
+        state["water"].clear()
+    return jsonify(state)
+
+@app.route("/api/config", methods=["GET", "POST"])
+def update_config():
+    if request.method == "POST":
+        for key, value in (request.get_json() or {}).items():
+            if key in config:
+                config[key] = value
+    return jsonify(config)
+
+class MockServer:
+    """The mock app served from a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = make_server(host, port, app, threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-loseit", daemon=True)
+        self.base_url = f"http://{host}:{self._server.server_port}/"
+
+    @property
+    def environment(self):
+        """Environment variables that point scripts.main at this server."""
+        return {
+            "LOSEIT_URL": self.base_url,
+            "LOSEIT_LOGIN_URL": f"{self.base_url}login?r={self.base_url}",
+            "LOSEIT_EMAIL": config["email"] or "mock@example.com",
+            "LOSEIT_PASSWORD": config["password"] or "mock-password",
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+def start_mock_server(host="127.0.0.1", port=0, latency_ms=0, glass_ms=0):
+    config["latency_ms"] = latency_ms
+    config["glass_ms"] = glass_ms
+    return MockServer(host, port).start()
+
+def run_log(server, log_path, log_water=True):
+    """Run one food log through scripts.main.main() against the mock and time it."""
+    os.environ.update(server.environment)
+    os.environ.setdefault("HEADLESS_MODE", "True")
+    from scripts.main import main
+    with open(log_path, 'r', encoding='utf-8') as f:
+        log_text = f.read()
+    start = time.perf_counter()
+    output = main(log_text, log_water)
+    elapsed = time.perf_counter() - start
+    return output, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline mock of the Lose It! web app.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every request and page action")
+    parser.add_argument("--glass-ms", type=int, default=0, help="How long the fixedGlass overlay stays after a search")
+    parser.add_argument("--run-log", help="Log this food log file through scripts.main.main() and exit")
+    args = parser.parse_args()
+
+    server = start_mock_server(args.host, args.port, args.latency_ms, args.glass_ms)
+    print(f"Mock Lose It! running at {server.base_url}")
+    for key, value in server.environment.items():
+        print(f"  {key}={value}")
+
+    if args.run_log:
+        output, elapsed = run_log(server, args.run_log)
+        print(output.replace("<br>", "\n"))
+        print(f"Logged in {elapsed:.2f} seconds. Diary state: {json.dumps(state)}")
+        server.stop()
+    else:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
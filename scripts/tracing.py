@@ -0,0 +1,72 @@
+# scripts/tracing.py
+
+import os
+from contextlib import contextmanager
+
+import sentry_sdk
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("tracing")
+
+# Per-endpoint overrides in SENTRY_TRACES_SAMPLE_RATES look like "/submit-log=0.5,/static=0,job=1".
+# Keys starting with "/" are path prefixes, anything else is a transaction op such as "job".
+DEFAULT_SAMPLE_RATES = "/static=0,/metrics=0,/queue=0"
+
+def parse_sample_rates(spec):
+    rates = {}
+    for entry in spec.split(","):
+        key, _, rate = entry.partition("=")
+        if not key.strip() or not rate.strip():
+            continue
+        try:
+            rates[key.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid sample rate '{entry}'.")
+    return rates
+
+def make_traces_sampler():
+    """
+    Build a Sentry traces_sampler from SENTRY_TRACES_SAMPLE_RATE and the
+    per-endpoint overrides. Read when called so app.py's .env file applies.
+    """
+    env = os.getenv('ENV', 'dev').lower()
+    # Tracing every production request is expensive, so only development traces everything by default
+    default_rate = float(os.getenv('SENTRY_TRACES_SAMPLE_RATE', '1.0' if env == "dev" else '0.1'))
+    rates = parse_sample_rates(os.getenv('SENTRY_TRACES_SAMPLE_RATES', DEFAULT_SAMPLE_RATES))
+    path_rates = sorted(
+        ((key, rate) for key, rate in rates.items() if key.startswith("/")),
+        key=lambda kv: -len(kv[0]),
+    )
+
+    def traces_sampler(sampling_context):
+        # Jobs continue the trace of the request that submitted them
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        op = (sampling_context.get("transaction_context") or {}).get("op")
+        if op in rates:
+            return rates[op]
+        path = (sampling_context.get("wsgi_environ") or {}).get("PATH_INFO", "")
+        for prefix, rate in path_rates:
+            if path.startswith(prefix):
+                return rate
+        return default_rate
+
+    return traces_sampler
+
+def trace_headers():
+    """Propagation headers of the current trace, to hand a job over to a worker thread."""
+    headers = {"sentry-trace": sentry_sdk.get_traceparent(), "baggage": sentry_sdk.get_baggage()}
+    return {key: value for key, value in headers.items() if value}
+
+@contextmanager
+def job_transaction(job_id, headers=None, **tags):
+    """Run one job in its own Sentry transaction, linked to the submitting request when headers are given."""
+    with sentry_sdk.isolation_scope():
+        transaction = sentry_sdk.continue_trace(headers or {}, op="job", name="process_log")
+        with sentry_sdk.start_transaction(transaction) as span:
+            span.set_tag("job_id", job_id)
+            for key, value in tags.items():
+                span.set_tag(key, str(value))
+            yield span
@@ -1,25 +1,14 @@
 # scripts/utils.py
 
-import logging
-import os
-from selenium.webdriver.common.by import By
+import hashlib
+import json
 import time
 import re
 from datetime import datetime
 
-# Ensure logs directory exists
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+from scripts.logging_setup import get_logger
 
-logging.basicConfig(
-    level=logging.INFO,  # Change to DEBUG for more detailed logs if needed
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(LOG_DIR, "utils.log"))
-    ]
-)
-logger = logging.getLogger(__name__)
+logger = get_logger("utils")
 
 # Parse food items from log text (original logic, just adding log_water)
 def parse_food_items(log_text, log_water=True):
@@ -55,6 +44,20 @@ def parse_food_items(log_text, log_water=True):
         food_items.append(current_food)
     return food_items
 
+# Normalize a parsed food item so equivalent pastes produce identical values
+def normalize_food_item(food_item):
+    normalized = {}
+    for key, value in food_item.items():
+        if isinstance(value, str):
+            value = " ".join(value.split()).lower()
+        normalized[key.strip().lower()] = value
+    return normalized
+
+# Content hash of a parsed submission, used to recognise resubmissions
+def fingerprint_food_items(food_items):
+    payload = json.dumps([normalize_food_item(item) for item in food_items], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 # Compare numeric values and return HTML-formatted result
 def compare_numeric_values(field_name, input_value, logged_value):
     try:
@@ -76,7 +79,7 @@ def compare_values(field_name, input_value, logged_value):
         input_num = float(input_value)
         logged_num = float(logged_value)
         if abs(input_num - logged_num) < 1e-6:
-            logger.info(f"{field_name}: Match found ({logged_num})")
+            logger.debug(f"{field_name}: Match found ({logged_num})")
             return f'<span style="color: green;">**{field_name}:** {logged_num} (matches input value)</span><br>'
         else:
             logger.warning(f"{field_name}: Mismatch (input: {input_num}, logged: {logged_num})")
@@ -84,66 +87,66 @@ def compare_values(field_name, input_value, logged_value):
     except ValueError:
         # Fallback to string comparison
         if str(input_value).strip().lower() == str(logged_value).strip().lower():
-            logger.info(f"{field_name}: String match found")
+            logger.debug(f"{field_name}: String match found")
             return f'<span style="color: green;">**{field_name}:** {logged_value} (matches input value)</span><br>'
         else:
             logger.warning(f"{field_name}: String mismatch")
             return f'<span style="color: red;">**{field_name}:** {logged_value} (does not match input value {input_value})</span><br>'
 
+COMPARISON_FIELDS = [
+    "Date", "Meal", "Brand", "Calories", "Fat (g)", "Saturated Fat (g)",
+    "Cholesterol (mg)", "Sodium (mg)", "Carbs (g)", "Fiber (g)",
+    "Sugar (g)", "Protein (g)"
+]
+
 # Compare lists of food items and generate HTML report
 def compare_items(input_items, logged_items):
-    comparison = ""
+    # Index logged items by Food Name once; the first logged item with a name wins
+    logged_by_name = {}
+    for item in logged_items:
+        logged_by_name.setdefault(item.get('Food Name', '').lower(), item)
+
+    parts = []
     for idx, input_item in enumerate(input_items, 1):
-        comparison += f"<b>Verifying item {idx} of {len(input_items)}: {input_item.get('Food Name', '')}</b><br>"
+        parts.append(f"<b>Verifying item {idx} of {len(input_items)}: {input_item.get('Food Name', '')}</b><br>")
 
         # Find matching logged item by Food Name
-        logged_item = next((item for item in logged_items if item.get('Food Name', '').lower() == input_item.get('Food Name', '').lower()), None)
+        logged_item = logged_by_name.get(input_item.get('Food Name', '').lower())
         if not logged_item:
             logger.error(f"Logged item not found for {input_item.get('Food Name', 'Unknown')}")
-            comparison += f"<span style='color: red;'>Logged item not found for {input_item.get('Food Name', '')}</span><br><br>"
+            parts.append(f"<span style='color: red;'>Logged item not found for {input_item.get('Food Name', '')}</span><br><br>")
             continue
 
-        fields = [
-            "Date", "Meal", "Brand", "Calories", "Fat (g)", "Saturated Fat (g)",
-            "Cholesterol (mg)", "Sodium (mg)", "Carbs (g)", "Fiber (g)",
-            "Sugar (g)", "Protein (g)"
-        ]
-
-        for field in fields:
-            comparison += compare_values(field, input_item.get(field, ''), logged_item.get(field, ''))
+        for field in COMPARISON_FIELDS:
+            parts.append(compare_values(field, input_item.get(field, ''), logged_item.get(field, '')))
 
         # Compare fluid ounces if available
         input_fluid = input_item.get('fluid_ounces')
         logged_fluid = logged_item.get('fluid_ounces_added')
         if input_fluid and logged_fluid:
-            comparison += compare_numeric_values("Fluid Ounces", input_fluid, logged_fluid)
-        comparison += "<br>"
+            parts.append(compare_numeric_values("Fluid Ounces", input_fluid, logged_fluid))
+        parts.append("<br>")
 
     # Compare total fluid ounces
     total_input_fluid = sum(float(item.get('fluid_ounces', 0.0)) for item in input_items if item.get('fluid_ounces'))
     total_logged_fluid = sum(float(item.get('fluid_ounces_added', 0.0)) for item in logged_items if item.get('fluid_ounces_added'))
     logger.info(f"Total fluid ounces - Input: {total_input_fluid}, Logged: {total_logged_fluid}")
-    comparison += "<b style='color: #f9c74f;'>Total Fluid Ounces Comparison:</b><br>"
-    comparison += compare_numeric_values("Total Fluid Ounces", total_input_fluid, total_logged_fluid)
+    parts.append("<b style='color: #f9c74f;'>Total Fluid Ounces Comparison:</b><br>")
+    parts.append(compare_numeric_values("Total Fluid Ounces", total_input_fluid, total_logged_fluid))
 
-    return comparison
+    return "".join(parts)
 
 # Close overlays or popups
 def close_overlays(driver):
+    from scripts.locators import find_overlay_close_buttons
+
     try:
-        overlay_selectors = [
-            "//div[@role='button' and @title='Close']",
-            "//button[contains(text(), 'Close')]",
-            "//div[contains(@class, 'overlay')]//button[contains(text(), 'Close')]"
-        ]
-        for selector in overlay_selectors:
-            buttons = driver.find_elements(By.XPATH, selector)
-            for btn in buttons:
-                try:
-                    btn.click()
-                    logger.info("Closed an overlay or popup.")
-                    time.sleep(1)
-                except Exception as e:
-                    logger.error(f"Failed to click overlay close button: {e}")
+        for btn in find_overlay_close_buttons(driver):
+            try:
+                btn.click()
+                logger.info("Closed an overlay or popup.")
+                time.sleep(1)
+            except Exception as e:
+                logger.error(f"Failed to click overlay close button: {e}")
     except Exception as e:
         logger.error(f"Error while closing overlays: {e}")
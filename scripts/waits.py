@@ -0,0 +1,111 @@
+# scripts/waits.py
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from scripts.logging_setup import get_logger
+from scripts.metrics import WAIT_DURATION, WAIT_POLL_INTERVAL, WAIT_TIMEOUT
+
+logger = get_logger("waits")
+
+ADAPTIVE_WAITS = os.getenv('ADAPTIVE_WAITS', 'True').lower() == 'true'
+# Recent outcomes kept per condition; nothing is learned from fewer than WAIT_MIN_SAMPLES
+WAIT_HISTORY = int(os.getenv('WAIT_HISTORY', '50'))
+WAIT_MIN_SAMPLES = int(os.getenv('WAIT_MIN_SAMPLES', '5'))
+# Learned timeout is the p95 of recent successes times this margin, within [WAIT_MIN_TIMEOUT_SECONDS, fixed timeout]
+WAIT_TIMEOUT_MARGIN = float(os.getenv('WAIT_TIMEOUT_MARGIN', '3'))
+WAIT_MIN_TIMEOUT_SECONDS = float(os.getenv('WAIT_MIN_TIMEOUT_SECONDS', '2'))
+# Selenium's own interval, used until a condition has history
+DEFAULT_POLL_SECONDS = 0.5
+MIN_POLL_SECONDS = 0.05
+# Aim for about this many polls during a typical wait
+POLLS_PER_WAIT = 4
+
+_lock = threading.Lock()
+_conditions = {}
+
+class _Condition:
+    def __init__(self, default_timeout, default_poll):
+        self.default_timeout = default_timeout
+        self.default_poll = default_poll
+        self.outcomes = deque(maxlen=WAIT_HISTORY)
+
+    def timing(self):
+        """(timeout, poll interval) from the recent outcomes, or the fixed values without enough data."""
+        successes = sorted(seconds for seconds, met in self.outcomes if met)
+        # A recent miss means the site may be slower than the history shows
+        if not ADAPTIVE_WAITS or len(successes) < WAIT_MIN_SAMPLES or not all(met for _, met in self.outcomes):
+            return self.default_timeout, self.default_poll
+        p50 = _percentile(successes, 50)
+        p95 = _percentile(successes, 95)
+        timeout = min(self.default_timeout, max(WAIT_MIN_TIMEOUT_SECONDS, p95 * WAIT_TIMEOUT_MARGIN))
+        poll = min(self.default_poll, max(MIN_POLL_SECONDS, p50 / POLLS_PER_WAIT))
+        return timeout, poll
+
+def _percentile(ordered, pct):
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+def _condition(name, default_timeout, default_poll):
+    # Caller holds _lock
+    condition = _conditions.get(name)
+    if condition is None:
+        condition = _conditions[name] = _Condition(default_timeout, default_poll)
+    else:
+        condition.default_timeout = default_timeout
+        condition.default_poll = default_poll
+    return condition
+
+def record(name, seconds, met):
+    with _lock:
+        condition = _conditions[name]
+        condition.outcomes.append((seconds, met))
+        timeout, poll = condition.timing()
+    WAIT_DURATION.labels(condition=name, result="met" if met else "timeout").observe(seconds)
+    WAIT_TIMEOUT.labels(condition=name).set(timeout)
+    WAIT_POLL_INTERVAL.labels(condition=name).set(poll)
+
+def wait_for(driver, name, condition, timeout, poll=DEFAULT_POLL_SECONDS):
+    """
+    WebDriverWait(driver, timeout).until(condition), with the timeout and poll
+    interval learned from how long `name` took recently. timeout and poll are
+    the conservative values used until there is enough history; the learned
+    timeout never exceeds them.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    with _lock:
+        wait_timeout, wait_poll = _condition(name, timeout, poll).timing()
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, wait_timeout, poll_frequency=wait_poll).until(condition)
+    except TimeoutException:
+        record(name, time.monotonic() - start, False)
+        if wait_timeout < timeout:
+            logger.info(f"Wait '{name}' timed out after the learned {wait_timeout:.2f}s (fixed timeout {timeout}s).")
+        raise
+    record(name, time.monotonic() - start, True)
+    return result
+
+def snapshot():
+    """Learned timing per condition, for /waits."""
+    with _lock:
+        stats = {}
+        for name, condition in _conditions.items():
+            successes = sorted(seconds for seconds, met in condition.outcomes if met)
+            timeout, poll = condition.timing()
+            stats[name] = {
+                "samples": len(condition.outcomes),
+                "timeouts": sum(1 for _, met in condition.outcomes if not met),
+                "p50_seconds": round(_percentile(successes, 50), 3) if successes else None,
+                "p95_seconds": round(_percentile(successes, 95), 3) if successes else None,
+                "timeout_seconds": round(timeout, 3),
+                "poll_seconds": round(poll, 3),
+                "fixed_timeout_seconds": condition.default_timeout,
+                "learned": (timeout, poll) != (condition.default_timeout, condition.default_poll),
+            }
+    return {"adaptive": ADAPTIVE_WAITS, "conditions": stats}
@@ -10,15 +10,20 @@ from selenium.common.exceptions import (
     NoSuchElementException,
     ElementClickInterceptedException,
 )
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from scripts.logging_setup import get_logger
+from scripts.screenshots import capture_failure
+from scripts.waits import wait_for
 from scripts.decorators import retry_on_failure
+from scripts.history import mark_water_recorded
+from scripts.journal import WATER_PENDING, WATER_RECORDED
+from scripts.locators import WATER_INPUT, WATER_PREVIOUS_DAY_BUTTON, WATER_RECORD_BUTTON
+from scripts.login import LOSEIT_URL
 
 logger = get_logger("water_intake")
 
-GOALS_URL = "https://www.loseit.com/#Goals:Water%20Intake%5EWater%20Intake"
-MAIN_URL = "https://www.loseit.com/"
+MAIN_URL = LOSEIT_URL
+GOALS_URL = f"{MAIN_URL}#Goals:Water%20Intake%5EWater%20Intake"
 
 @retry_on_failure(max_retries=3, delay=2)
 def navigate_to_water_goals_page(driver):
@@ -36,8 +41,8 @@ def navigate_to_water_goals_page(driver):
 def get_current_water_date(driver):
     # Get the current date displayed on the water intake page
     try:
-        date_element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "GCJ-IGUC0B"))
+        date_element = wait_for(
+            driver, "water_date", EC.presence_of_element_located((By.CLASS_NAME, "GCJ-IGUC0B")), 10
         )
         current_date_text = date_element.text.strip().replace('\xa0', ' ')
         logger.info(f"Current date on water intake page: {current_date_text}")
@@ -55,8 +60,8 @@ def navigate_water_day(driver, days):
             logger.info("No need to navigate days.")
             return True
         for _ in range(days):
-            prev_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@title='Previous']"))
+            prev_button = wait_for(
+                driver, "water_previous_day_button", EC.element_to_be_clickable(WATER_PREVIOUS_DAY_BUTTON), 10
             )
             prev_button.click()
             logger.info("Clicked 'Previous Day' button.")
@@ -73,9 +78,7 @@ def navigate_water_day(driver, days):
 def get_current_water_intake(driver):
     # Retrieve current water intake from input box
     try:
-        water_input = WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.XPATH, "//input[@type='text' and contains(@class, 'GCJ-IGUKWC')]"))
-        )
+        water_input = wait_for(driver, "water_input", EC.visibility_of_element_located(WATER_INPUT), 10)
         water_value_str = water_input.get_attribute('value').strip()
         logger.info(f"Current water intake value in input box: {water_value_str}")
         current_water = float(water_value_str)
@@ -89,24 +92,17 @@ def get_current_water_intake(driver):
 def set_water_intake(driver, water_oz):
     # Set new water intake value and record it
     try:
-        water_input = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@type='text' and contains(@class, 'GCJ-IGUKWC')]"))
-        )
+        water_input = wait_for(driver, "water_input", EC.element_to_be_clickable(WATER_INPUT), 10)
         water_input.clear()
         water_input.send_keys(str(water_oz))
         logger.info(f"Entered new water intake: {water_oz} oz")
 
-        WebDriverWait(driver, 10).until(
-            EC.text_to_be_present_in_element_value(
-                (By.XPATH, "//input[@type='text' and contains(@class, 'GCJ-IGUKWC')]"),
-                str(water_oz)
-            )
+        wait_for(
+            driver, "water_value", EC.text_to_be_present_in_element_value(WATER_INPUT, str(water_oz)), 10
         )
         logger.info(f"Verified new water intake in input box: {water_oz} oz")
 
-        record_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'recordButton')]"))
-        )
+        record_button = wait_for(driver, "water_record_button", EC.element_to_be_clickable(WATER_RECORD_BUTTON), 10)
         record_button.click()
         logger.info("Clicked Record button to save water intake.")
 
@@ -114,11 +110,11 @@ def set_water_intake(driver, water_oz):
         return True
     except TimeoutException:
         logger.error("Water intake input box or Record button not found/clickable.")
-        driver.save_screenshot("/tmp/set_water_intake_timeout.png")
+        capture_failure(driver, "set_water_intake_timeout")
         return False
     except Exception as e:
         logger.error(f"Failed to set water intake: {e}")
-        driver.save_screenshot("/tmp/set_water_intake_error.png")
+        capture_failure(driver, "set_water_intake_error")
         return False
 
 @retry_on_failure(max_retries=3, delay=2)
@@ -134,8 +130,12 @@ def navigate_to_main_page(driver):
         return False
 
 @retry_on_failure(max_retries=3, delay=2)
-def update_water_intake(driver, food_item, days_difference):
-    # Update water intake based on fluid ounces in the food item
+def update_water_intake(driver, food_item, days_difference, journal=None, item_index=None, account=None):
+    # Update water intake based on fluid ounces in the food item.
+    # With a journal, the values before and after are written ahead of the Record click
+    # so a resumed job can tell whether an interrupted update was already applied.
+    # The history store's pending flag is cleared together with WATER_RECORDED, so a
+    # failed return to the diary afterwards cannot get the water added a second time.
     serving_size = food_item.get("Serving Size", "").lower()
     if "fluid ounce" in serving_size:
         try:
@@ -181,13 +181,31 @@ def update_water_intake(driver, food_item, days_difference):
                 logger.error("Could not retrieve current water intake. Skipping update.")
                 return None
 
+            pending = journal.item_steps(item_index).get(WATER_PENDING) if journal else None
+            if pending and abs(current_water - pending["after"]) < 1e-6:
+                logger.info(f"Water intake already shows {current_water} oz from before the restart. Not adding again.")
+                # A retry after a failed return to the diary finds its own update already recorded
+                if WATER_RECORDED not in journal.item_steps(item_index):
+                    journal.record(WATER_RECORDED, item_index, before=pending["before"], after=pending["after"])
+                    if account:
+                        mark_water_recorded(account, food_item)
+                if not navigate_to_main_page(driver):
+                    return None
+                return current_water
+
             updated_water = current_water + total_fluid_oz
             logger.info(f"Current water intake: {current_water} oz")
             logger.info(f"Adding {total_fluid_oz} oz")
             logger.info(f"Updated water intake will be: {updated_water} oz")
 
+            if journal:
+                journal.record(WATER_PENDING, item_index, before=current_water, after=updated_water)
             if not set_water_intake(driver, updated_water):
                 return None
+            if journal:
+                journal.record(WATER_RECORDED, item_index, before=current_water, after=updated_water)
+            if account:
+                mark_water_recorded(account, food_item)
 
             if not navigate_to_main_page(driver):
                 return None
@@ -0,0 +1,120 @@
+# scripts/webdriver_trace.py
+
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from scripts.logging_setup import get_logger
+
+logger = get_logger("webdriver_trace")
+
+TRACE_WEBDRIVER = os.getenv('TRACE_WEBDRIVER', 'True').lower() == 'true'
+# Commands are attributed to the innermost function from these modules on the call stack
+TRACED_MODULES = (
+    "scripts.navigation", "scripts.food_entry", "scripts.water_intake", "scripts.login",
+    "scripts.decorators", "scripts.main", "scripts.network_capture",
+)
+SLOWEST_COMMANDS = 5
+
+def _calling_function():
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module in TRACED_MODULES:
+            return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "other"
+
+class CommandTracer:
+    """
+    Counts and times every WebDriver command sent by a driver.
+
+    All commands (find_element, click, send_keys, ActionChains.perform,
+    execute_script, get, refresh, CDP calls) go through driver.execute, so
+    wrapping that one method sees every round trip to chromedriver.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_caller = defaultdict(lambda: [0, 0.0])
+        self._by_command = defaultdict(lambda: [0, 0.0])
+        self._slowest = []
+        self.total_commands = 0
+        self.total_seconds = 0.0
+
+    def install(self, driver):
+        execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            caller = _calling_function()
+            start = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self._record(caller, driver_command, time.perf_counter() - start)
+
+        driver.execute = traced_execute
+        driver.command_tracer = self
+        return self
+
+    def _record(self, caller, command, seconds):
+        with self._lock:
+            self.total_commands += 1
+            self.total_seconds += seconds
+            for stats in (self._by_caller[caller], self._by_command[command]):
+                stats[0] += 1
+                stats[1] += seconds
+            entry = (seconds, command, caller)
+            if len(self._slowest) < SLOWEST_COMMANDS:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "total_commands": self.total_commands,
+                "total_seconds": round(self.total_seconds, 3),
+                "by_caller": {
+                    caller: {"count": count, "seconds": round(seconds, 3)}
+                    for caller, (count, seconds) in sorted(self._by_caller.items(), key=lambda kv: -kv[1][1])
+                },
+                "by_command": {
+                    command: {"count": count, "seconds": round(seconds, 3)}
+                    for command, (count, seconds) in sorted(self._by_command.items(), key=lambda kv: -kv[1][1])
+                },
+                "slowest": [
+                    {"command": command, "caller": caller, "seconds": round(seconds, 3)}
+                    for seconds, command, caller in sorted(self._slowest, reverse=True)
+                ],
+            }
+
+    def log_summary(self, num_items):
+        summary = self.summary()
+        per_item = summary["total_commands"] / num_items if num_items else 0
+        logger.info(
+            f"WebDriver: {summary['total_commands']} commands ({per_item:.1f} per item), "
+            f"{summary['total_seconds']:.2f}s on the wire."
+        )
+        for caller, stats in summary["by_caller"].items():
+            logger.info(f"  {caller}: {stats['count']} commands, {stats['seconds']:.2f}s")
+        for slow in summary["slowest"]:
+            logger.info(f"  Slow command {slow['command']} from {slow['caller']}: {slow['seconds']:.2f}s")
+
+    def format_report(self, num_items):
+        """HTML summary for the job output."""
+        summary = self.summary()
+        per_item = summary["total_commands"] / num_items if num_items else 0
+        lines = [
+            "<b style='color: #f9c74f;'>WebDriver Commands:</b>",
+            f"{summary['total_commands']} commands ({per_item:.1f} per item), {summary['total_seconds']:.2f} seconds on the wire",
+        ]
+        for caller, stats in list(summary["by_caller"].items())[:5]:
+            lines.append(f"{caller}: {stats['count']} commands, {stats['seconds']:.2f}s")
+        if summary["slowest"]:
+            slowest = ", ".join(f"{slow['command']} in {slow['caller']} ({slow['seconds']:.2f}s)" for slow in summary["slowest"][:3])
+            lines.append(f"Slowest: {slowest}")
+        return "<br>".join(lines)
@@ -116,7 +116,12 @@ document.addEventListener('DOMContentLoaded', () => {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         cache: 'no-store',
-        body: JSON.stringify({ log: logText, log_water: logWaterToggleValue })
+        // Admins can open the page with ?profile=1 to profile this submission
+        body: JSON.stringify({
+          log: logText,
+          log_water: logWaterToggleValue,
+          profile: new URLSearchParams(window.location.search).get('profile') === '1'
+        })
       });
   
       const contentType = response.headers.get("content-type");